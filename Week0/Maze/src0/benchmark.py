@@ -0,0 +1,207 @@
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import generate
+from field import DistanceField
+from grid import Grid
+from maze import Maze
+
+STRATEGIES = ["dfs", "bfs", "greedy", "astar"]
+
+
+def random_maze(height, width, density, seed):
+    """
+    Returns the text of a maze with random walls, the start in the top
+    left corner and the goal in the bottom right one.
+    """
+    return generate.text(generate.random_walls(height, width, density, seed))
+
+
+def load_text(text):
+    """
+    Returns a Maze parsed from text.
+    """
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        f.write(text)
+    try:
+        return Maze(f.name)
+    finally:
+        os.remove(f.name)
+
+
+def solvable_maze(height, width, density, seed):
+    """
+    Returns a random Maze that has a solution.
+    """
+    while True:
+        maze = load_text(random_maze(height, width, density, seed))
+        try:
+            maze.solve("bfs")
+            return maze
+        except Exception:
+            seed += 1
+
+
+def run(name, maze):
+    for strategy in STRATEGIES:
+        start = time.perf_counter()
+        maze.solve(strategy)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>14} {strategy:>7}: {maze.num_explored:9} explored "
+              f"{len(maze.solution[0]):7} steps {1000 * elapsed:10.2f} ms")
+
+
+def measure(function):
+    """
+    Returns the result of function(), its wall time and its peak
+    traced memory in bytes, from one untraced and one traced run.
+    """
+    # Don't charge a collection of earlier mazes to this run
+    gc.collect()
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+
+    # Tracing slows allocations down, so it gets a run of its own
+    tracemalloc.start()
+    result = function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def grid_benchmark(size):
+    """
+    Compares loading and solving with Maze (lists) and Grid (NumPy).
+    """
+    for n in [size // 4, size // 2, size]:
+        descriptor, filename = tempfile.mkstemp(suffix=".txt")
+        os.close(descriptor)
+        try:
+            # Grid is fast enough to find a solvable seed
+            seed = 0
+            while True:
+                with open(filename, "w") as f:
+                    f.write(random_maze(n, n, density=0.3, seed=seed))
+                try:
+                    Grid.from_file(filename).solve()
+                    break
+                except Exception:
+                    seed += 1
+
+            for name, load, strategy in [("Maze", Maze, ("bfs",)), ("Grid", Grid.from_file, ())]:
+                maze, load_time, load_peak = measure(lambda: load(filename))
+                _, solve_time, solve_peak = measure(lambda: maze.solve(*strategy))
+                print(f"{n:>5}x{n:<5} {name}: load {load_time:8.3f} s {load_peak / 2 ** 20:8.1f} MiB  "
+                      f"solve {solve_time:8.3f} s {solve_peak / 2 ** 20:8.1f} MiB  "
+                      f"{len(maze.solution[0]):7} steps")
+                del maze
+        finally:
+            os.remove(filename)
+
+
+def scaling(sizes, seed=0):
+    """
+    Solves generated mazes of every kind and size with every strategy.
+
+    Returns one record per run with the states explored, the wall time
+    and the peak traced memory of Maze.solve.
+    """
+    results = []
+    for kind in generate.GENERATORS:
+        for n in sizes:
+            # Perfect mazes always have a solution; random ones may not
+            if kind == "random":
+                maze = solvable_maze(n, n, density=0.3, seed=seed)
+            else:
+                maze = load_text(generate.text(generate.generate(kind, n, n, seed)))
+            for strategy in STRATEGIES:
+                _, elapsed, peak = measure(lambda: maze.solve(strategy))
+                results.append({
+                    "generator": kind,
+                    "size": n,
+                    "strategy": strategy,
+                    "explored": maze.num_explored,
+                    "steps": len(maze.solution[0]),
+                    "seconds": elapsed,
+                    "peak_bytes": peak
+                })
+                print(f"{kind:>11} {n:>5}x{n:<5} {strategy:>7}: {maze.num_explored:9} explored "
+                      f"{elapsed:8.3f} s {peak / 2 ** 20:8.1f} MiB", file=sys.stderr)
+            del maze
+    return results
+
+
+def agents_benchmark(size, count):
+    """
+    Routes count agents from random cells to the goal of one maze, with a
+    search per agent and with one distance field for all of them.
+    """
+    maze = load_text(generate.text(generate.backtracker(size, size, seed=0)))
+    rng = random.Random(0)
+    cells = [(i, j) for i in range(maze.height) for j in range(maze.width) if not maze.walls[i][j]]
+    starts = rng.sample(cells, count)
+
+    start = time.perf_counter()
+    searched = []
+    for state in starts:
+        maze.start = state
+        maze.solve("bfs")
+        searched.append(len(maze.solution[0]))
+    elapsed = time.perf_counter() - start
+    print(f"{size:>5}x{size:<5} {count} searches:       {elapsed:8.3f} s")
+
+    start = time.perf_counter()
+    field = DistanceField.build(Grid.from_maze(maze))
+    built = time.perf_counter() - start
+    routed = [len(field.path(state)[0]) for state in starts]
+    elapsed = time.perf_counter() - start
+    print(f"{size:>5}x{size:<5} 1 field, {count} paths: {elapsed:8.3f} s ({built:.3f} s to build)")
+    if routed != searched:
+        raise Exception("distance field paths differ from searched paths")
+
+
+def main():
+    usage = ("Usage: python benchmark.py strategies [size]\n"
+             "       python benchmark.py grid [size]\n"
+             "       python benchmark.py scaling [size] [report.json]\n"
+             "       python benchmark.py agents [size] [count]")
+    if len(sys.argv) not in [2, 3, 4] or (len(sys.argv) == 4 and sys.argv[1] not in ["scaling", "agents"]):
+        sys.exit(usage)
+    command = sys.argv[1]
+    size = int(sys.argv[2]) if len(sys.argv) >= 3 else None
+
+    if command == "strategies":
+        directory = os.path.dirname(os.path.abspath(__file__))
+        for name in ["maze1.txt", "maze2.txt", "maze3.txt"]:
+            run(name, Maze(os.path.join(directory, name)))
+        size = size or 200
+        for n in [size // 4, size // 2, size]:
+            run(f"random {n}x{n}", solvable_maze(n, n, density=0.3, seed=0))
+    elif command == "grid":
+        grid_benchmark(size or 1000)
+    elif command == "scaling":
+        size = size or 400
+        sizes = [size // 8 + 1, size // 4 + 1, size // 2 + 1, size + 1]
+        report = {"python": sys.version.split()[0], "results": scaling(sizes)}
+        if len(sys.argv) == 4:
+            with open(sys.argv[3], "w") as f:
+                json.dump(report, f, indent=2)
+        else:
+            json.dump(report, sys.stdout, indent=2)
+            print()
+    elif command == "agents":
+        count = int(sys.argv[3]) if len(sys.argv) == 4 else 100
+        agents_benchmark(size or 201, count)
+    else:
+        sys.exit(usage)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import hashlib
+import os
+import sys
+
+import numpy as np
+
+from grid import ACTIONS, Grid
+
+# Action that undoes each of ACTIONS
+OPPOSITE = {"up": "down", "down": "up", "left": "right", "right": "left"}
+UNREACHABLE = -1
+
+
+class DistanceField():
+    """
+    Distances and first moves towards a maze's goal from every cell.
+
+    One breadth-first search from the goal gives every reached cell the
+    direction it was reached from; walking against those directions leads
+    back to the goal along a shortest path. Any number of starts can then
+    be answered in time proportional to the length of their path.
+    """
+
+    def __init__(self, grid, parents, distances):
+        self.grid = grid
+        self.parents = parents
+        self.distances = distances
+
+    @classmethod
+    def build(cls, grid):
+        """
+        Searches grid from its goal.
+        """
+        distances = np.full(grid.open.size, UNREACHABLE, dtype=np.int32)
+        parents, _ = grid.wavefront(grid.index(grid.goal), distances=distances)
+        return cls(grid, parents, distances)
+
+    @classmethod
+    def cached(cls, grid, directory):
+        """
+        Loads the field of grid from directory, or builds and saves it there.
+
+        Fields are stored under a hash of the walls and goal, so a changed
+        maze never reuses a stale field. Cached arrays are memory mapped,
+        and only the cells a query visits are read.
+        """
+        prefix = os.path.join(directory, key(grid))
+        paths = [prefix + ".parents.npy", prefix + ".distances.npy"]
+        if all(os.path.exists(path) for path in paths):
+            return cls(grid, *(np.load(path, mmap_mode="r") for path in paths))
+
+        field = cls.build(grid)
+        os.makedirs(directory, exist_ok=True)
+        for path, array in zip(paths, [field.parents, field.distances]):
+            # Write to a temporary file first so readers never see half a field
+            temporary = f"{path}.{os.getpid()}.tmp"
+            with open(temporary, "wb") as f:
+                np.save(f, array)
+            os.replace(temporary, path)
+        return field
+
+    def distance(self, state):
+        """
+        Returns the number of steps from state to the goal, or None if
+        the goal cannot be reached from it.
+        """
+        distance = int(self.distances[self.grid.index(state)])
+        return None if distance == UNREACHABLE else distance
+
+    def path(self, state):
+        """
+        Returns the (actions, cells) of a shortest path from state to the
+        goal, in the same form as Maze.solution, or None if there is none.
+        """
+        index = self.grid.index(state)
+        if self.distances[index] == UNREACHABLE:
+            return None
+
+        # Plain ints and a memoryview are much faster to step through
+        # one cell at a time than NumPy scalars
+        parents = memoryview(self.parents)
+        offsets = [int(offset) for offset in self.grid.offsets]
+        moves = [OPPOSITE[action] for action in ACTIONS]
+        goal = self.grid.index(self.grid.goal)
+        actions = []
+        cells = []
+        while index != goal:
+            direction = parents[index]
+            actions.append(moves[direction])
+            index -= offsets[direction]
+            cells.append(index)
+        return actions, [self.grid.state(index) for index in cells]
+
+
+def key(grid):
+    """
+    Returns a hex digest of the walls and goal of grid.
+    """
+    digest = hashlib.sha256()
+    digest.update(repr((grid.height, grid.width, grid.goal)).encode())
+    digest.update(grid.padded.tobytes())
+    return digest.hexdigest()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python field.py maze.txt [cache directory]")
+
+    g = Grid.from_file(sys.argv[1])
+    if len(sys.argv) == 3:
+        f = DistanceField.cached(g, sys.argv[2])
+    else:
+        f = DistanceField.build(g)
+    print("Reachable cells:", int((f.distances != UNREACHABLE).sum()))
+    print("Solution length:", f.distance(g.start))
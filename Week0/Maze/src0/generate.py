@@ -0,0 +1,151 @@
+import random
+import sys
+
+WALL = ord("#")
+OPEN = ord(" ")
+
+
+def blank(height, width):
+    """
+    Returns height rows of width wall characters.
+    """
+    return [bytearray(b"#" * width) for _ in range(height)]
+
+
+def place(rows, start, goal):
+    rows[start[0]][start[1]] = ord("A")
+    rows[goal[0]][goal[1]] = ord("B")
+    return rows
+
+
+def last_cell(height, width):
+    """
+    Returns the bottom right cell with odd coordinates,
+    where perfect mazes put their goal.
+    """
+    # Even sizes leave an extra row or column of wall on the far side
+    return (height - 2 - (height % 2 == 0), width - 2 - (width % 2 == 0))
+
+
+def cell_neighbors(cell, height, width):
+    """
+    Returns the cells two steps away from cell, with the wall between them.
+    """
+    i, j = cell
+    for di, dj in [(-2, 0), (2, 0), (0, -2), (0, 2)]:
+        r, c = i + di, j + dj
+        if 0 < r < height - 1 and 0 < c < width - 1:
+            yield (r, c), (i + di // 2, j + dj // 2)
+
+
+def backtracker(height, width, seed=None):
+    """
+    Returns the rows of a perfect maze (exactly one path between any two
+    cells) carved by a randomized depth-first search.
+
+    Cells sit at odd coordinates; the start is the top left cell and the
+    goal the bottom right one.
+    """
+    if height < 3 or width < 3:
+        raise Exception("maze must be at least 3x3")
+    rng = random.Random(seed)
+    rows = blank(height, width)
+
+    start = (1, 1)
+    rows[1][1] = OPEN
+    stack = [start]
+    while stack:
+        cell = stack[-1]
+        choices = [
+            (neighbor, wall) for neighbor, wall in cell_neighbors(cell, height, width)
+            if rows[neighbor[0]][neighbor[1]] == WALL
+        ]
+        if not choices:
+            stack.pop()
+            continue
+        (r, c), (wr, wc) = rng.choice(choices)
+        rows[wr][wc] = OPEN
+        rows[r][c] = OPEN
+        stack.append((r, c))
+
+    return place(rows, start, last_cell(height, width))
+
+
+def prim(height, width, seed=None):
+    """
+    Returns the rows of a perfect maze grown from the start by
+    randomized Prim's algorithm, which gives shorter, bushier dead
+    ends than the backtracker.
+    """
+    if height < 3 or width < 3:
+        raise Exception("maze must be at least 3x3")
+    rng = random.Random(seed)
+    rows = blank(height, width)
+
+    start = (1, 1)
+    rows[1][1] = OPEN
+    walls = list(cell_neighbors(start, height, width))
+    while walls:
+        # Pop a random wall by swapping it with the last one
+        k = rng.randrange(len(walls))
+        walls[k], walls[-1] = walls[-1], walls[k]
+        (r, c), (wr, wc) = walls.pop()
+        if rows[r][c] == WALL:
+            rows[wr][wc] = OPEN
+            rows[r][c] = OPEN
+            walls.extend(cell_neighbors((r, c), height, width))
+
+    return place(rows, start, last_cell(height, width))
+
+
+def random_walls(height, width, density=0.3, seed=None):
+    """
+    Returns the rows of a maze where every cell is a wall with probability
+    density, the start in the top left corner and the goal in the bottom
+    right one. It may have no solution, or many.
+    """
+    rng = random.Random(seed)
+    rows = [
+        bytearray(WALL if rng.random() < density else OPEN for _ in range(width))
+        for _ in range(height)
+    ]
+    return place(rows, (0, 0), (height - 1, width - 1))
+
+
+GENERATORS = {
+    "backtracker": backtracker,
+    "prim": prim,
+    "random": random_walls
+}
+
+
+def generate(kind, height, width, seed=None):
+    """
+    Returns the rows of a maze made by the generator named kind.
+    """
+    if kind not in GENERATORS:
+        raise Exception(f"unknown generator {kind}")
+    return GENERATORS[kind](height, width, seed=seed)
+
+
+def write(rows, f):
+    """
+    Writes maze rows to a binary file in the text format Maze reads.
+    """
+    for row in rows:
+        f.write(row)
+        f.write(b"\n")
+
+
+def text(rows):
+    return b"\n".join(rows).decode() + "\n"
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in [4, 5]:
+        sys.exit("Usage: python generate.py backtracker|prim|random height width [seed]")
+
+    kind = sys.argv[1]
+    height, width = int(sys.argv[2]), int(sys.argv[3])
+    seed = int(sys.argv[4]) if len(sys.argv) == 5 else None
+    write(generate(kind, height, width, seed), sys.stdout.buffer)
@@ -0,0 +1,188 @@
+import sys
+
+import numpy as np
+
+from maze import wall_row
+
+# Moves in the order Maze.neighbors lists them
+ACTIONS = ["up", "down", "left", "right"]
+NO_PARENT = -1
+
+
+class Grid():
+    """
+    A maze stored as a NumPy boolean wall array, for big mazes.
+
+    Internally the walls are padded with a border of walls and cells are
+    numbered by flat index into the padded array, so the neighbors of
+    cell c are simply c - width, c + width, c - 1 and c + 1.
+    """
+
+    def __init__(self, walls, start, goal, padded=False):
+        """
+        Makes a maze from its wall array or, if padded, from a wall array
+        already surrounded by a border of walls, which is used without a copy.
+        """
+        if padded:
+            self.padded = walls
+            self.height, self.width = walls.shape[0] - 2, walls.shape[1] - 2
+        else:
+            self.height, self.width = walls.shape
+            # Padded walls, one byte per cell
+            self.padded = np.ones((self.height + 2, self.width + 2), dtype=bool)
+            self.padded[1:-1, 1:-1] = walls
+        self.start = start
+        self.goal = goal
+        self.open = ~self.padded.ravel()
+
+        row = self.width + 2
+        self.offsets = np.array([-row, row, -1, 1])
+
+        self.solution = None
+        self.explored = None
+
+    @property
+    def walls(self):
+        return self.padded[1:-1, 1:-1]
+
+    @classmethod
+    def from_maze(cls, maze):
+        return cls(np.array(maze.walls, dtype=bool), maze.start, maze.goal)
+
+    @classmethod
+    def from_file(cls, filename):
+        """
+        Reads a maze in the same text format as Maze.
+
+        The file is streamed twice, a line at a time: once to validate
+        it and find its size, then to fill in the wall array, so memory
+        stays at one byte per cell however big the file is.
+        """
+        height = width = starts = goals = 0
+        with open(filename) as f:
+            for line in f:
+                line = line.rstrip("\n")
+                height += 1
+                width = max(width, len(line))
+                starts += line.count("A")
+                goals += line.count("B")
+
+        if starts != 1:
+            raise Exception("maze must have exactly one start point")
+        if goals != 1:
+            raise Exception("maze must have exactly one goal")
+
+        # Columns count characters, not bytes, as in Maze
+        padded = np.ones((height + 2, width + 2), dtype=bool)
+        padded[1:-1, 1:-1] = False
+        with open(filename) as f:
+            for i, line in enumerate(f):
+                line = line.rstrip("\n")
+                padded[i + 1, 1:len(line) + 1] = np.frombuffer(wall_row(line), dtype=np.uint8)
+                if "A" in line:
+                    start = (i, line.index("A"))
+                if "B" in line:
+                    goal = (i, line.index("B"))
+
+        return cls(padded, start, goal, padded=True)
+
+    def index(self, state):
+        """
+        Returns the flat padded index of cell (i, j).
+        """
+        return (state[0] + 1) * (self.width + 2) + state[1] + 1
+
+    def state(self, index):
+        """
+        Returns the cell (i, j) of a flat padded index.
+        """
+        i, j = divmod(int(index), self.width + 2)
+        return (i - 1, j - 1)
+
+    def wavefront(self, source, target=None, distances=None):
+        """
+        Runs a breadth-first search from the source index, expanding the
+        whole frontier with array operations at every step.
+
+        Returns the parent direction of every reached cell (an index into
+        ACTIONS, NO_PARENT elsewhere) and the reached cells as a mask,
+        stopping after the level that reaches target, if given. If a
+        distances array is given, the level of every reached cell is
+        written into it.
+        """
+        parents = np.full(self.open.size, NO_PARENT, dtype=np.int8)
+        reached = np.zeros(self.open.size, dtype=bool)
+        reached[source] = True
+        frontier = np.array([source])
+        if distances is not None:
+            distances[source] = 0
+
+        level = 0
+        while frontier.size and not (target is not None and reached[target]):
+            level += 1
+            found = []
+            for direction, offset in enumerate(self.offsets):
+                neighbors = frontier + offset
+                neighbors = neighbors[self.open[neighbors] & ~reached[neighbors]]
+                reached[neighbors] = True
+                parents[neighbors] = direction
+                found.append(neighbors)
+            frontier = np.concatenate(found)
+            if distances is not None:
+                distances[frontier] = level
+
+        return parents, reached
+
+    def path(self, parents, source, target):
+        """
+        Returns the (actions, cells) from source to target by following
+        parent directions back from target, or None if target was not reached.
+        """
+        if target != source and parents[target] == NO_PARENT:
+            return None
+        actions = []
+        cells = []
+        index = target
+        while index != source:
+            direction = int(parents[index])
+            actions.append(ACTIONS[direction])
+            cells.append(self.state(index))
+            index -= int(self.offsets[direction])
+        actions.reverse()
+        cells.reverse()
+        return actions, cells
+
+    def solve(self):
+        """Finds a shortest solution to maze, if one exists."""
+        source = self.index(self.start)
+        target = self.index(self.goal)
+        parents, reached = self.wavefront(source, target)
+
+        self.solution = self.path(parents, source, target)
+        if self.solution is None:
+            raise Exception("no solution")
+
+        self.explored = reached.reshape(self.padded.shape)[1:-1, 1:-1]
+        self.num_explored = int(reached.sum())
+
+    def output_image(self, filename, show_solution=True, show_explored=False, stream=None):
+        import render
+        solution = self.solution[1] if self.solution is not None else None
+        render.render(
+            filename, self.walls, self.start, self.goal,
+            solution=solution,
+            explored=self.explored if solution is not None else None,
+            show_solution=show_solution,
+            show_explored=show_explored,
+            stream=stream
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python grid.py maze.txt")
+
+    g = Grid.from_file(sys.argv[1])
+    g.solve()
+    print("States Explored:", g.num_explored)
+    print("Solution length:", len(g.solution[0]))
@@ -1,26 +1,32 @@
+import heapq
 import sys
+from collections import deque
 
 class Node():
-    # Keep trak of state, parent, action
-    def __init__(self, state, parent, action):
+    # Keep trak of state, parent, action, and the cost (number of steps)
+    # to reach the state from the start
+    def __init__(self, state, parent, action, cost=0):
         self.state = state
         self.parent = parent
         self.action = action
+        self.cost = cost
 
 # Object and function to manipulate the object
 # Stack lasti in first out DFS
 class StackFrontier():
-    # A function that initiali create a frontier represented used a list
-    # Empty list
+    # A function that initiali create a frontier represented used a deque,
+    # plus a count of the nodes for each state so lookups don't scan it
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     # Check if a frontier contain a particular state
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     # Check if the frontier is empty
     def empty(self):
@@ -30,10 +36,18 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self.discard(node.state)
             return node
 
+    # Forget one node with that state
+    def discard(self, state):
+        count = self.states[state] - 1
+        if count:
+            self.states[state] = count
+        else:
+            del self.states[state]
+
 # Queue first in first out BFS
 # Inharets the stack frontier, is going to do everything that the
 # stackfrontier is doing exept the way we remove a node from the frontier
@@ -43,48 +57,81 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self.discard(node.state)
             return node
 
+# Priority queue, removes the node with the lowest priority first
+# (greedy best-first search and A* search). The frontier is a binary heap
+# of (priority, order added, node), so ties go to the oldest node
+class PriorityFrontier(StackFrontier):
+
+    def __init__(self, priority):
+        super().__init__()
+        self.frontier = []
+        self.priority = priority
+        self.added = 0
+
+    def add(self, node):
+        heapq.heappush(self.frontier, (self.priority(node), self.added, node))
+        self.added += 1
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            _, _, node = heapq.heappop(self.frontier)
+            self.discard(node.state)
+            return node
+
+
+# Heuristics estimate the distance from a state to the goal
+def manhattan(state, goal):
+    return abs(state[0] - goal[0]) + abs(state[1] - goal[1])
+
+
+# Maps each ASCII character to 1 for a wall or 0 for an open cell
+WALL_BYTES = bytes(chr(b) not in "AB " for b in range(128)) + bytes(128)
+
+def wall_row(line):
+    """
+    Returns a bytearray with 1 for each wall and 0 for each open cell.
+    """
+    if line.isascii():
+        return bytearray(line, "ascii").translate(WALL_BYTES)
+    return bytearray(c not in "AB " for c in line)
+
 class Maze():
 
     def __init__(self, filename):
 
-        # Read file and set height and width of maze
+        # Read file a line at a time, keeping track of walls,
+        # one byte per cell
+        self.walls = []
+        starts = goals = 0
         with open(filename) as f:
-            contents = f.read()
+            for i, line in enumerate(f):
+                line = line.rstrip("\n")
+                if "A" in line:
+                    starts += line.count("A")
+                    self.start = (i, line.index("A"))
+                if "B" in line:
+                    goals += line.count("B")
+                    self.goal = (i, line.index("B"))
+                self.walls.append(wall_row(line))
 
         # Validate start and goal
-        if contents.count("A") != 1:
+        if starts != 1:
             raise Exception("maze must have exactly one start point")
-        if contents.count("B") != 1:
+        if goals != 1:
             raise Exception("maze must have exactly one goal")
 
-        # Determine height and width of maze
-        contents = contents.splitlines()
-        self.height = len(contents)
-        self.width = max(len(line) for line in contents)
-
-        # Keep track of walls
-        self.walls = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                try:
-                    if contents[i][j] == "A":
-                        self.start = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == "B":
-                        self.goal = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == " ":
-                        row.append(False)
-                    else:
-                        row.append(True)
-                except IndexError:
-                    row.append(False)
-            self.walls.append(row)
+        # Determine height and width of maze, treating short lines as open
+        self.height = len(self.walls)
+        self.width = max(len(row) for row in self.walls)
+        for row in self.walls:
+            row.extend(bytes(self.width - len(row)))
 
         self.solution = None
 
@@ -124,17 +171,35 @@ class Maze():
         return result
 
 
-    def solve(self):
-        """Finds a solution to maze, if one exists."""
+    def solve(self, strategy="dfs", heuristic=manhattan):
+        """
+        Finds a solution to maze, if one exists, using a search strategy:
+        "dfs" (depth-first), "bfs" (breadth-first), "greedy" (greedy
+        best-first by heuristic) or "astar" (A* by steps + heuristic).
+
+        BFS and A* find a shortest solution.
+        """
 
         # Keep track of number of states explored
         self.num_explored = 0
 
         # Initialize frontier to just the starting position
         start = Node(state=self.start, parent=None, action=None)
-        frontier = StackFrontier()
+        if strategy == "dfs":
+            frontier = StackFrontier()
+        elif strategy == "bfs":
+            frontier = QueueFrontier()
+        elif strategy == "greedy":
+            frontier = PriorityFrontier(lambda node: heuristic(node.state, self.goal))
+        elif strategy == "astar":
+            frontier = PriorityFrontier(lambda node: node.cost + heuristic(node.state, self.goal))
+        else:
+            raise Exception(f"unknown strategy {strategy}")
         frontier.add(start)
 
+        # Fewest steps found so far to each state (A* only)
+        best_cost = {self.start: 0}
+
         # Initialize an empty explored set
         self.explored = set()
 
@@ -145,8 +210,11 @@ class Maze():
             if frontier.empty():
                 raise Exception("no solution")
 
-            # Choose a node from the frontier
+            # Choose a node from the frontier, skipping the stale copies
+            # A* leaves behind when it finds a shorter way to a state
             node = frontier.remove()
+            if node.state in self.explored:
+                continue
             self.num_explored += 1
 
             # If node is the goal, then we have a solution
@@ -167,71 +235,42 @@ class Maze():
 
             # Add neighbors to frontier
             for action, state in self.neighbors(node.state):
-                if not frontier.contains_state(state) and state not in self.explored:
+                if state in self.explored:
+                    continue
+
+                # A* adds a state again whenever it gets there in fewer steps
+                if strategy == "astar":
+                    cost = node.cost + 1
+                    if cost < best_cost.get(state, cost + 1):
+                        best_cost[state] = cost
+                        frontier.add(Node(state=state, parent=node, action=action, cost=cost))
+                elif not frontier.contains_state(state):
                     child = Node(state=state, parent=node, action=action)
                     frontier.add(child)
 
 
     def output_image(self, filename, show_solution=True, show_explored=False):
-        from PIL import Image, ImageDraw
-        cell_size = 50
-        cell_border = 2
-
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA",
-            (self.width * cell_size, self.height * cell_size),
-            "black"
-        )
-        draw = ImageDraw.Draw(img)
-
+        import render
         solution = self.solution[1] if self.solution is not None else None
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-
-                # Walls
-                if col:
-                    fill = (40, 40, 40)
-
-                # Start
-                elif (i, j) == self.start:
-                    fill = (255, 0, 0)
-
-                # Goal
-                elif (i, j) == self.goal:
-                    fill = (0, 171, 28)
+        render.render(
+            filename, self.walls, self.start, self.goal,
+            solution=solution,
+            explored=self.explored if solution is not None else None,
+            show_solution=show_solution,
+            show_explored=show_explored
+        )
 
-                # Solution
-                elif solution is not None and show_solution and (i, j) in solution:
-                    fill = (220, 235, 113)
 
-                # Explored
-                elif solution is not None and show_explored and (i, j) in self.explored:
-                    fill = (212, 97, 85)
+if __name__ == "__main__":
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python maze.py maze.txt [dfs|bfs|greedy|astar]")
 
-                # Empty cell
-                else:
-                    fill = (237, 240, 252)
-
-                # Draw cell
-                draw.rectangle(
-                    ([(j * cell_size + cell_border, i * cell_size + cell_border),
-                      ((j + 1) * cell_size - cell_border, (i + 1) * cell_size - cell_border)]),
-                    fill=fill
-                )
-
-        img.save(filename)
-
-
-if len(sys.argv) != 2:
-    sys.exit("Usage: python maze.py maze.txt")
-
-m = Maze(sys.argv[1])
-print("Maze:")
-m.print()
-print("Solving...")
-m.solve()
-print("States Explored:", m.num_explored)
-print("Solution:")
-m.print()
-m.output_image("maze.png", show_explored=True)
+    m = Maze(sys.argv[1])
+    print("Maze:")
+    m.print()
+    print("Solving...")
+    m.solve(sys.argv[2] if len(sys.argv) == 3 else "dfs")
+    print("States Explored:", m.num_explored)
+    print("Solution:")
+    m.print()
+    m.output_image("maze.png", show_explored=True)
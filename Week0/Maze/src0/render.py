@@ -0,0 +1,149 @@
+import struct
+import zlib
+
+import numpy as np
+
+# Palette indices of the kinds of cell, in the colors Maze has always used
+BORDER = 0
+WALL = 1
+START = 2
+GOAL = 3
+SOLUTION = 4
+EXPLORED = 5
+EMPTY = 6
+
+PALETTE = np.array([
+    (0, 0, 0),
+    (40, 40, 40),
+    (255, 0, 0),
+    (0, 171, 28),
+    (220, 235, 113),
+    (212, 97, 85),
+    (237, 240, 252)
+], dtype=np.uint8)
+
+# Largest image, in pixels, built in memory before switching to streaming
+MAX_PIXELS = 2 ** 26
+
+
+def cell_mask(cells, shape):
+    """
+    Returns a boolean mask of shape marking cells, which may already be
+    a mask or an iterable of (i, j) pairs.
+    """
+    if isinstance(cells, np.ndarray):
+        return cells.astype(bool, copy=False)
+    mask = np.zeros(shape, dtype=bool)
+    cells = np.array(list(cells), dtype=np.intp).reshape(-1, 2)
+    mask[cells[:, 0], cells[:, 1]] = True
+    return mask
+
+
+def cell_kinds(walls, start, goal, solution=None, explored=None,
+               show_solution=True, show_explored=False):
+    """
+    Returns the palette index of every cell of the maze.
+
+    Like the original per-cell drawing, the explored cells are only shown
+    along with a solution.
+    """
+    walls = np.asarray(walls, dtype=bool)
+    kinds = np.full(walls.shape, EMPTY, dtype=np.uint8)
+    if solution is not None:
+        # Later assignments take priority over earlier ones
+        if show_explored and explored is not None:
+            kinds[cell_mask(explored, walls.shape)] = EXPLORED
+        if show_solution:
+            kinds[cell_mask(solution, walls.shape)] = SOLUTION
+    kinds[goal] = GOAL
+    kinds[start] = START
+    kinds[walls] = WALL
+    return kinds
+
+
+def inside(cell_size, cell_border):
+    """
+    Returns which pixels of a cell's side are filled rather than border.
+
+    draw.rectangle includes both corners, so a cell keeps one more pixel
+    on its far side than on its near side.
+    """
+    filled = np.zeros(cell_size, dtype=bool)
+    filled[cell_border:cell_size - cell_border + 1] = True
+    return filled
+
+
+def scanline(kinds_row, filled):
+    """
+    Returns the palette indices of one pixel row crossing the inside of a row of cells.
+    """
+    line = np.repeat(kinds_row, len(filled))
+    line[~np.tile(filled, len(kinds_row))] = BORDER
+    return line
+
+
+def render_array(kinds, cell_size=50, cell_border=2):
+    """
+    Returns the full-size image of the cells as an RGBA array.
+    """
+    filled = inside(cell_size, cell_border)
+    pixels = np.repeat(np.repeat(kinds, cell_size, axis=0), cell_size, axis=1)
+    pixels[~np.tile(filled, kinds.shape[0])] = BORDER
+    pixels[:, ~np.tile(filled, kinds.shape[1])] = BORDER
+
+    image = np.empty(pixels.shape + (4,), dtype=np.uint8)
+    image[..., :3] = PALETTE[pixels]
+    image[..., 3] = 255
+    return image
+
+
+def chunk(f, kind, data):
+    f.write(struct.pack(">I", len(data)))
+    f.write(kind)
+    f.write(data)
+    f.write(struct.pack(">I", zlib.crc32(kind + data)))
+
+
+def write_png(filename, kinds, cell_size=50, cell_border=2):
+    """
+    Writes the image of the cells as a palette PNG, one row of cells at a
+    time, so memory stays proportional to the width of the image.
+    """
+    height, width = kinds.shape[0] * cell_size, kinds.shape[1] * cell_size
+    filled = inside(cell_size, cell_border)
+
+    # Each pixel row starts with its filter type, 0 for none
+    blank = bytes(width + 1)
+    compressor = zlib.compressobj()
+    with open(filename, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        chunk(f, b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 3, 0, 0, 0))
+        chunk(f, b"PLTE", PALETTE.tobytes())
+        for row in kinds:
+            line = b"\0" + scanline(row, filled).tobytes()
+            data = compressor.compress(b"".join(line if y else blank for y in filled))
+            if data:
+                chunk(f, b"IDAT", data)
+        chunk(f, b"IDAT", compressor.flush())
+        chunk(f, b"IEND", b"")
+
+
+def render(filename, walls, start, goal, solution=None, explored=None,
+           show_solution=True, show_explored=False, cell_size=50, cell_border=2,
+           stream=None):
+    """
+    Draws a maze to filename.
+
+    solution and explored may be masks or iterables of (i, j) cells. Images
+    with more than MAX_PIXELS pixels are streamed to a PNG row by row
+    instead of being built in memory, unless stream says otherwise.
+    """
+    kinds = cell_kinds(walls, start, goal, solution, explored, show_solution, show_explored)
+    if stream is None:
+        stream = kinds.size * cell_size ** 2 > MAX_PIXELS
+    if stream:
+        write_png(filename, kinds, cell_size, cell_border)
+        return
+
+    from PIL import Image
+    Image.fromarray(render_array(kinds, cell_size, cell_border), "RGBA").save(filename)
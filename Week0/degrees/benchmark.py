@@ -0,0 +1,331 @@
+import multiprocessing
+import random
+import resource
+import sys
+import time
+
+import degrees
+from graph import load_graph
+from landmarks import load_index
+from nameindex import NameIndex
+from parallel import ParallelSearch
+from snapshot import load_cached_graph
+from util import Node, QueueFrontier
+
+
+def count_expansions(search, source, target):
+    """
+    Runs search(source, target) and returns the path it found, the number
+    of people it expanded and the wall time it took.
+    """
+    expansions = 0
+    neighbors_for_person = degrees.neighbors_for_person
+
+    def counting_neighbors(person_id):
+        nonlocal expansions
+        expansions += 1
+        return neighbors_for_person(person_id)
+
+    # shortest_path looks the function up on every call, so swapping the
+    # module attribute is enough to count how many people get expanded
+    degrees.neighbors_for_person = counting_neighbors
+    try:
+        start = time.perf_counter()
+        path = search(source, target)
+        elapsed = time.perf_counter() - start
+    finally:
+        degrees.neighbors_for_person = neighbors_for_person
+
+    return path, expansions, elapsed
+
+
+def search_benchmark(directory, pairs, seed):
+    """
+    Compares the one-sided and the bidirectional BFS on random pairs,
+    on the dicts read from the CSV files and on the cached graph.
+    """
+    searches = [
+        ("bfs", lambda s, t: degrees.shortest_path(s, t)),
+        ("bidirectional", lambda s, t: degrees.shortest_path(s, t, bidirectional=True))
+    ]
+    queries = None
+    lengths = None
+    print(f"{pairs} random pairs from {directory}")
+    for data, cache in [("dicts", False), ("cached", True)]:
+        degrees.load_data(directory, cache=cache)
+        if queries is None:
+            rng = random.Random(seed)
+            person_ids = sorted(degrees.people)
+            queries = [(rng.choice(person_ids), rng.choice(person_ids)) for _ in range(pairs)]
+            lengths = [set() for _ in queries]
+
+        for name, search in searches:
+            total_expansions = 0
+            total_elapsed = 0.0
+            for (source, target), found in zip(queries, lengths):
+                path, expansions, elapsed = count_expansions(search, source, target)
+                found.add(None if path is None else len(path))
+                total_expansions += expansions
+                total_elapsed += elapsed
+
+            # The cached graph is searched without neighbors_for_person
+            counted = f"{total_expansions / pairs:12.1f}" if not cache else f"{'-':>12}"
+            print(f"{name + ', ' + data:>22}: {counted} expansions/query "
+                  f"{1000 * total_elapsed / pairs:10.3f} ms/query")
+
+    # Every search must agree on the degrees of separation
+    for (source, target), found in zip(queries, lengths):
+        if len(found) != 1:
+            sys.exit(f"Mismatch between {source} and {target}: {found}")
+
+
+class ListQueueFrontier():
+    """
+    The original list-backed queue frontier, kept for comparison.
+    """
+    def __init__(self):
+        self.frontier = []
+
+    def add(self, node):
+        self.frontier.append(node)
+
+    def contains_state(self, state):
+        return any(node.state == state for node in self.frontier)
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier[0]
+            self.frontier = self.frontier[1:]
+            return node
+
+
+def frontier_benchmark(size, lookups):
+    """
+    Fills each frontier with size nodes, checks membership of lookups
+    states and then drains it, timing every phase.
+    """
+    print(f"Frontier with {size} nodes, {lookups} lookups")
+    for name, frontier in [("list", ListQueueFrontier()), ("deque", QueueFrontier())]:
+        start = time.perf_counter()
+        for i in range(size):
+            frontier.add(Node(state=i, parent=None, action=None))
+        added = time.perf_counter()
+
+        # Missing states are the worst case for a linear scan
+        for i in range(lookups):
+            frontier.contains_state(-i)
+        checked = time.perf_counter()
+
+        while not frontier.empty():
+            frontier.remove()
+        drained = time.perf_counter()
+
+        print(f"{name:>6}: add {added - start:8.3f} s  "
+              f"contains {checked - added:8.3f} s  "
+              f"remove {drained - checked:8.3f} s")
+
+
+def measure_load(loader, directory, results):
+    """
+    Loads directory with loader in a fresh process and reports
+    the load time and the peak resident set size in KiB.
+    """
+    start = time.perf_counter()
+    if loader == "dict":
+        degrees.load_data(directory, cache=False)
+    elif loader == "graph":
+        load_graph(directory)
+    else:
+        load_cached_graph(directory)
+    elapsed = time.perf_counter() - start
+    results.put((elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+
+
+def load_benchmark(directory, pairs, seed):
+    """
+    Compares load time, peak RSS and query time of the dict
+    representation, the CSR graph and its memory-mapped snapshot.
+    """
+    # A spawned child starts from an empty interpreter, so its peak RSS
+    # only counts the loader being measured
+    context = multiprocessing.get_context("spawn")
+    print(f"Loading {directory}")
+    for loader in ["dict", "graph", "snapshot"]:
+        results = context.Queue()
+        process = context.Process(target=measure_load, args=(loader, directory, results))
+        process.start()
+        elapsed, rss = results.get()
+        process.join()
+        print(f"{loader:>8}: load {elapsed:8.3f} s  peak RSS {rss / 1024:8.1f} MiB")
+
+    degrees.load_data(directory, cache=False)
+    graph = load_graph(directory)
+    rng = random.Random(seed)
+    person_ids = sorted(degrees.people)
+    queries = [(rng.choice(person_ids), rng.choice(person_ids)) for _ in range(pairs)]
+
+    for name, search in [
+        ("dict", lambda s, t: degrees.shortest_path(s, t, bidirectional=True)),
+        ("graph", graph.shortest_path)
+    ]:
+        start = time.perf_counter()
+        for source, target in queries:
+            search(source, target)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>8}: {1000 * elapsed / pairs:10.3f} ms/query (bidirectional)")
+
+
+def landmarks_benchmark(directory, pairs, seed):
+    """
+    Times landmark bounds and the pruned exact search against the
+    plain bidirectional search on the graph.
+    """
+    index = load_index(directory)
+    graph = index.graph
+    rng = random.Random(seed)
+    people = len(graph.person_ids)
+    queries = [(rng.randrange(people), rng.randrange(people)) for _ in range(pairs)]
+
+    start = time.perf_counter()
+    bounds = [index.index_bounds(s, t) for s, t in queries]
+    elapsed = time.perf_counter() - start
+    print(f"{len(index.landmarks)} landmarks, {pairs} random pairs from {directory}")
+    print(f"  bounds: {1e6 * elapsed / pairs:10.3f} us/query")
+
+    paths = {}
+    for name, search in [("graph", graph.index_path), ("pruned", index.index_path)]:
+        start = time.perf_counter()
+        paths[name] = [search(s, t) for s, t in queries]
+        elapsed = time.perf_counter() - start
+        print(f"{name:>8}: {1000 * elapsed / pairs:10.3f} ms/query")
+
+    exact = 0
+    for (s, t), (lower, upper), path, pruned in zip(queries, bounds, paths["graph"], paths["pruned"]):
+        if (path is None) != (pruned is None) or (path is not None and len(path) != len(pruned)):
+            sys.exit(f"Pruned search disagrees with the plain search between {s} and {t}")
+        if path is not None and not lower <= len(path) <= upper:
+            sys.exit(f"Bounds {lower}, {upper} miss the degrees between {s} and {t}")
+        if path is not None and lower == upper == len(path):
+            exact += 1
+    print(f"Bounds were exact for {exact} of {pairs} pairs")
+
+
+def parallel_benchmark(directory, pairs, seed):
+    """
+    Times the parallel search with 1, 2, 4 and 8 workers.
+    """
+    graph = load_cached_graph(directory)
+    rng = random.Random(seed)
+    people = len(graph.person_ids)
+    queries = [(rng.randrange(people), rng.randrange(people)) for _ in range(pairs)]
+    expected = [graph.index_path(s, t) for s, t in queries]
+
+    print(f"{pairs} random pairs from {directory}")
+    baseline = None
+    for workers in [1, 2, 4, 8]:
+        with ParallelSearch(directory, workers) as search:
+            start = time.perf_counter()
+            paths = [search.index_path(s, t) for s, t in queries]
+            elapsed = time.perf_counter() - start
+
+        for path, other in zip(paths, expected):
+            if (path is None) != (other is None) or (path is not None and len(path) != len(other)):
+                sys.exit("Parallel search disagrees with the serial search")
+
+        baseline = baseline or elapsed
+        print(f"{workers} workers: {1000 * elapsed / pairs:10.3f} ms/query "
+              f"speedup {baseline / elapsed:5.2f}x")
+
+
+def names_benchmark(directory, queries, seed):
+    """
+    Times building the name index and exact, prefix, short prefix and
+    typo lookups, after checking that a short prefix finds a heavy person
+    among many lighter ones.
+    """
+    index = NameIndex(
+        [("1", "Tom Hanks", 50)]
+        + [(str(i), f"Person Ha{i:04d}", 1) for i in range(2, 2002)]
+    )
+    for query in ["tom h", "tom ha", "h", "ha"]:
+        if index.search(query)[:1] != [("1", "Tom Hanks")]:
+            sys.exit(f"Name index misses Tom Hanks for {query!r}")
+
+    degrees.load_data(directory)
+    start = time.perf_counter()
+    degrees.person_candidates("")
+    print(f"Name index for {directory} built in {time.perf_counter() - start:.3f} s")
+
+    rng = random.Random(seed)
+    person_ids = sorted(degrees.people)
+    full = [degrees.people[rng.choice(person_ids)]["name"] for _ in range(queries)]
+
+    def typo(name):
+        i = rng.randrange(len(name))
+        return name[:i] + name[i + 1:]
+
+    def short(name):
+        words = name.split() or [""]
+        return " ".join(words[:-1] + [words[-1][:1]])
+
+    for kind, names in [
+        ("exact", full),
+        ("prefix", [name[:max(1, len(name) - 3)] for name in full]),
+        ("short", [short(name) for name in full]),
+        ("typo", [typo(name) for name in full])
+    ]:
+        found = 0
+        start = time.perf_counter()
+        for name, original in zip(names, full):
+            if any(candidate == original for _, candidate in degrees.person_candidates(name)):
+                found += 1
+        elapsed = time.perf_counter() - start
+        print(f"{kind:>8}: {1000 * elapsed / queries:8.3f} ms/query, "
+              f"intended person in top 10 for {found}/{queries}")
+
+
+def main():
+    usage = ("Usage: python benchmark.py search [directory] [pairs]\n"
+             "       python benchmark.py frontier [size]\n"
+             "       python benchmark.py load [directory] [pairs]\n"
+             "       python benchmark.py landmarks [directory] [pairs]\n"
+             "       python benchmark.py parallel [directory] [pairs]\n"
+             "       python benchmark.py names [directory] [queries]")
+    if len(sys.argv) < 2:
+        sys.exit(usage)
+    command, args = sys.argv[1], sys.argv[2:]
+
+    if command == "search" and len(args) <= 2:
+        directory = args[0] if len(args) >= 1 else "large"
+        pairs = int(args[1]) if len(args) == 2 else 100
+        search_benchmark(directory, pairs, seed=0)
+    elif command == "frontier" and len(args) <= 1:
+        size = int(args[0]) if args else 10 ** 5
+        frontier_benchmark(size, lookups=1000)
+    elif command == "load" and len(args) <= 2:
+        directory = args[0] if len(args) >= 1 else "large"
+        pairs = int(args[1]) if len(args) == 2 else 100
+        load_benchmark(directory, pairs, seed=0)
+    elif command == "landmarks" and len(args) <= 2:
+        directory = args[0] if len(args) >= 1 else "large"
+        pairs = int(args[1]) if len(args) == 2 else 100
+        landmarks_benchmark(directory, pairs, seed=0)
+    elif command == "parallel" and len(args) <= 2:
+        directory = args[0] if len(args) >= 1 else "large"
+        pairs = int(args[1]) if len(args) == 2 else 100
+        parallel_benchmark(directory, pairs, seed=0)
+    elif command == "names" and len(args) <= 2:
+        directory = args[0] if len(args) >= 1 else "large"
+        queries = int(args[1]) if len(args) == 2 else 1000
+        names_benchmark(directory, queries, seed=0)
+    else:
+        sys.exit(usage)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,12 @@
 import csv
+import itertools
 import sys
 
-from util import Node, StackFrontier, QueueFrontier
+from graph import NamesView, PeopleView, MoviesView
+from landmarks import load_index
+from nameindex import NameIndex
+from snapshot import load_cached_graph
+from util import Node, StackFrontier, QueueFrontier, bidirectional_search
 
 # Maps names to a set of corresponding person_ids
 # {"name":{id,id,id}}
@@ -19,11 +24,49 @@ people = {}
 # "stars": [person_id,...,...]}
 movies = {}
 
+# The Graph behind names, people and movies when loaded from the cache,
+# searched directly by person and movie index
+graph = None
 
-def load_data(directory):
+# Directory the data was loaded from, and the landmark index of its
+# cached graph, built on first use
+data_directory = None
+landmark_index = None
+
+# Fuzzy and prefix index of people's names, built on first use
+name_index = None
+
+# Queries answered at a time in batch mode; each batch is held in memory
+# and its rows are written once its searches finish
+QUERY_BATCH = 10000
+
+
+def load_data(directory, cache=True):
     """
     Load data from CSV files into memory.
+
+    With cache, the data is read from a binary snapshot of the CSV files
+    (built on first use) that is memory-mapped, so later runs start at
+    once and share its pages; names, people and movies become read-only
+    views of it, and searches run on the graph itself.
     """
+    global names, people, movies, graph, name_index, data_directory, landmark_index
+    name_index = None
+    data_directory = directory
+    landmark_index = None
+
+    if cache:
+        graph = load_cached_graph(directory)
+        names = NamesView(graph)
+        people = PeopleView(graph)
+        movies = MoviesView(graph)
+        return
+
+    graph = None
+    names = {}
+    people = {}
+    movies = {}
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -60,9 +103,16 @@ def load_data(directory):
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python degrees.py [directory] [queries]")
+    directory = sys.argv[1] if len(sys.argv) >= 2 else "large"
+
+    # Answer every "name,name" line of the queries file, without prompting
+    if len(sys.argv) == 3:
+        load_data(directory)
+        with open(sys.argv[2], encoding="utf-8") as f:
+            answer_queries(csv.reader(f), sys.stdout)
+        return
 
     # Load data from files into memory
     print("Loading data...")
@@ -91,13 +141,34 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False, landmarks=False):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
-    If no possible path, returns None.
+    If bidirectional is True, searches from both ends at once
+    (see bidirectional_path).
+
+    If landmarks is True, searches from both ends with the bounds of the
+    landmark index of the cached graph (see landmarks.py), which is
+    built and saved the first time. Without the cache it is the same as
+    bidirectional.
+
+    If no possible path, returns None; a person is connected to
+    themselves by the empty path.
     """
+    if source == target:
+        return []
+    if landmarks and graph is not None:
+        global landmark_index
+        if landmark_index is None:
+            landmark_index = load_index(data_directory, graph=graph)
+        return landmark_index.shortest_path(source, target)
+    if bidirectional or landmarks:
+        return bidirectional_path(source, target)
+    if graph is not None:
+        return graph.paths_from(source, [target])[target]
+
     # Keep track of number of states explored
     #num_explored = 0
 
@@ -147,6 +218,121 @@ def shortest_path(source, target):
                 frontier.add(child)
 
 
+def bidirectional_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching breadth-first
+    from both people and meeting in the middle.
+
+    If no possible path, returns None.
+    """
+    if graph is not None:
+        return graph.shortest_path(source, target)
+
+    # Looked up on every call, so it can be swapped to count expansions
+    return bidirectional_search(source, target, lambda person_id: neighbors_for_person(person_id))
+
+
+def shortest_paths_from(source, targets):
+    """
+    Returns a dict mapping each of the targets to the shortest list of
+    (movie_id, person_id) pairs that connect the source to it, or to None
+    if there is no possible path.
+
+    Runs a single breadth-first search from the source, which stops as
+    soon as every target has been reached.
+    """
+    if graph is not None:
+        return graph.paths_from(source, targets)
+
+    remaining = set(targets)
+    paths = {target: None for target in remaining}
+    if source in remaining:
+        paths[source] = []
+        remaining.discard(source)
+
+    # Maps each reached person to the (movie_id, person_id) step
+    # that leads one person closer to the source
+    parents = {source: None}
+    frontier = [source]
+
+    while frontier and remaining:
+        next_frontier = []
+        for person_id in frontier:
+            for movie_id, neighbor in neighbors_for_person(person_id):
+                if neighbor not in parents:
+                    parents[neighbor] = (movie_id, person_id)
+                    next_frontier.append(neighbor)
+                    remaining.discard(neighbor)
+        frontier = next_frontier
+
+    for target in paths:
+        if target in parents and target != source:
+            solution = []
+            person_id = target
+            while parents[person_id] is not None:
+                movie_id, parent = parents[person_id]
+                solution.append((movie_id, person_id))
+                person_id = parent
+            solution.reverse()
+            paths[target] = solution
+
+    return paths
+
+
+def answer_queries(queries, out, batch_size=QUERY_BATCH):
+    """
+    Answers (source name, target name) queries, writing one CSV row of
+    source, target, status, degrees, path per query to out, in the order
+    of the queries.
+
+    Queries are read batch_size at a time and grouped by source, so each
+    source is searched only once per batch; the rows of a batch are
+    written as soon as its searches finish.
+    """
+    writer = csv.writer(out)
+    writer.writerow(["source", "target", "status", "degrees", "path"])
+
+    queries = (query for query in queries if len(query) == 2)
+    while True:
+        batch = list(itertools.islice(queries, batch_size))
+        if not batch:
+            break
+
+        # Rows of the batch in query order, and the (row, source id,
+        # target id) of those waiting on a search
+        rows = []
+        pending = []
+        for source_name, target_name in batch:
+            source = names.get(source_name.lower(), set())
+            target = names.get(target_name.lower(), set())
+            if len(source) != 1 or len(target) != 1:
+                status = "ambiguous name" if len(source) > 1 or len(target) > 1 else "unknown name"
+                rows.append([source_name, target_name, status, "", ""])
+                continue
+            rows.append([source_name, target_name])
+            pending.append((rows[-1], next(iter(source)), next(iter(target))))
+
+        # Maps each source id to the target ids of its queries
+        targets = {}
+        for row, source, target in pending:
+            targets.setdefault(source, []).append(target)
+        paths = {
+            source: shortest_paths_from(source, source_targets)
+            for source, source_targets in targets.items()
+        }
+        for row, source, target in pending:
+            path = paths[source][target]
+            if path is None:
+                row.extend(["not connected", "", ""])
+            else:
+                steps = " ".join(f"{movie_id}:{person_id}" for movie_id, person_id in path)
+                row.extend(["connected", len(path), steps])
+
+        writer.writerows(rows)
+        out.flush()
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
@@ -173,11 +359,44 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def person_candidates(name, limit=10):
+    """
+    Returns up to limit (person_id, name) pairs whose names best
+    match name, best first, without prompting.
+
+    Matches ignore case and accents, the last word may be just the start
+    of a name, and any word may have one typo. Among equal matches,
+    people who starred in more movies come first.
+    """
+    global name_index
+    if name_index is None and graph is not None:
+        # Weights come from the graph's offsets, without building the views
+        offsets = graph.person_offsets
+        name_index = NameIndex(
+            (graph.person_id(p), graph.names[p], offsets[p + 1] - offsets[p])
+            for p in range(len(graph.person_ids))
+        )
+    elif name_index is None:
+        name_index = NameIndex(
+            (person_id, person["name"], len(person["movies"]))
+            for person_id, person in people.items()
+        )
+    return name_index.search(name, limit)
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        p = graph.person_index(person_id)
+        if p is None:
+            raise KeyError(person_id)
+        return {
+            (graph.movie_id(m), graph.person_id(q)) for m, q in graph.neighbors_for_person(p)
+        }
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
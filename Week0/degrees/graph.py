@@ -0,0 +1,400 @@
+import csv
+from array import array
+from collections.abc import Mapping
+from bisect import bisect_left
+
+from util import bidirectional_search, join_paths
+
+
+class StringTable():
+    """
+    Many strings stored as one UTF-8 blob plus an array of offsets,
+    so a million names cost a couple of objects instead of a million.
+    """
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def build(cls, strings):
+        offsets = array("q", [0])
+        chunks = []
+        size = 0
+        for string in strings:
+            chunk = string.encode("utf-8")
+            chunks.append(chunk)
+            size += len(chunk)
+            offsets.append(size)
+        return cls(b"".join(chunks), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+
+class LowerNames():
+    """
+    Sequence of lowercased names in name_order, for bisecting.
+    """
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __len__(self):
+        return len(self.graph.name_order)
+
+    def __getitem__(self, k):
+        return self.graph.names[self.graph.name_order[k]].lower()
+
+
+class Graph():
+    """
+    The people/movies/stars dataset as a bipartite graph in compressed
+    sparse row (CSR) form.
+
+    People and movies are numbered 0..n-1 in order of their IMDB id.
+    The movies of person p are
+        person_movies[person_offsets[p]:person_offsets[p + 1]]
+    and the stars of movie m are
+        movie_stars[movie_offsets[m]:movie_offsets[m + 1]]
+    """
+    def __init__(self, person_ids, movie_ids,
+                 person_offsets, person_movies,
+                 movie_offsets, movie_stars,
+                 names, births, titles, years, name_order):
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+        self.names = names
+        self.births = births
+        self.titles = titles
+        self.years = years
+        self.name_order = name_order
+
+    def person_index(self, person_id):
+        """
+        Returns the index of the person with that IMDB id, or None.
+        """
+        return find(self.person_ids, person_id)
+
+    def movie_index(self, movie_id):
+        """
+        Returns the index of the movie with that IMDB id, or None.
+        """
+        return find(self.movie_ids, movie_id)
+
+    def person_id(self, p):
+        return str(self.person_ids[p])
+
+    def movie_id(self, m):
+        return str(self.movie_ids[m])
+
+    def movies_for_person(self, p):
+        return self.person_movies[self.person_offsets[p]:self.person_offsets[p + 1]]
+
+    def stars_for_movie(self, m):
+        return self.movie_stars[self.movie_offsets[m]:self.movie_offsets[m + 1]]
+
+    def people_named(self, name):
+        """
+        Returns the indices of every person whose name matches,
+        ignoring case.
+        """
+        name = name.lower()
+        lower_names = LowerNames(self)
+        k = bisect_left(lower_names, name)
+        found = []
+        while k < len(lower_names) and lower_names[k] == name:
+            found.append(self.name_order[k])
+            k += 1
+        return found
+
+    def neighbors_for_person(self, p):
+        """
+        Returns (movie, person) index pairs for people
+        who starred with person p.
+        """
+        person_offsets, movie_offsets = self.person_offsets, self.movie_offsets
+        movie_stars = self.movie_stars
+        neighbors = []
+        for m in self.person_movies[person_offsets[p]:person_offsets[p + 1]]:
+            for q in movie_stars[movie_offsets[m]:movie_offsets[m + 1]]:
+                neighbors.append((m, q))
+        return neighbors
+
+    def shortest_path(self, source, target, index_path=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, given their IMDB ids.
+
+        The search is index_path(s, t) on person indices if given, such as
+        a landmark or parallel search over this graph, or Graph.index_path.
+        If no possible path, returns None.
+        """
+        s = self.person_index(source)
+        t = self.person_index(target)
+        if s is None or t is None:
+            return None
+
+        path = (index_path or self.index_path)(s, t)
+        if path is None:
+            return None
+        return self.id_path(path)
+
+    def id_path(self, path):
+        """
+        Returns a list of (movie, person) index pairs as IMDB ids.
+        """
+        return [(self.movie_id(m), self.person_id(p)) for m, p in path]
+
+    def index_path(self, s, t):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        that connect person s to person t, or None.
+
+        Searches breadth-first from both ends, always expanding the
+        smaller frontier by a whole level.
+        """
+        return bidirectional_search(s, t, self.neighbors_for_person)
+
+
+    def paths_from(self, source, targets):
+        """
+        Returns a dict mapping each of the targets to the shortest list of
+        (movie_id, person_id) pairs that connect the source to it, or to
+        None if there is no possible path, given their IMDB ids.
+        """
+        s = self.person_index(source)
+        indices = {target: self.person_index(target) for target in targets}
+        paths = dict.fromkeys(indices)
+        if s is None:
+            return paths
+
+        found = self.index_paths_from(s, [t for t in indices.values() if t is not None])
+        for target, t in indices.items():
+            if t is not None and found[t] is not None:
+                paths[target] = self.id_path(found[t])
+        return paths
+
+    def index_paths_from(self, s, targets):
+        """
+        Returns a dict mapping each of the target indices to the shortest
+        list of (movie, person) index pairs that connect person s to it,
+        or to None.
+
+        Runs a single breadth-first search from s, which stops as soon
+        as every target has been reached.
+        """
+        remaining = set(targets)
+        remaining.discard(s)
+        person_offsets, movie_offsets = self.person_offsets, self.movie_offsets
+        person_movies, movie_stars = self.person_movies, self.movie_stars
+
+        parents = {s: None}
+        frontier = [s]
+        while frontier and remaining:
+            next_frontier = []
+            for p in frontier:
+                for m in person_movies[person_offsets[p]:person_offsets[p + 1]]:
+                    for q in movie_stars[movie_offsets[m]:movie_offsets[m + 1]]:
+                        if q not in parents:
+                            parents[q] = (m, p)
+                            next_frontier.append(q)
+                            remaining.discard(q)
+            frontier = next_frontier
+
+        # A path from s ends where the (empty) path back from t starts
+        return {
+            t: join_paths(parents, {t: None}, t) if t in parents else None
+            for t in targets
+        }
+
+
+class Record(Mapping):
+    """
+    A dict-like row whose fields are only decoded when looked up.
+    """
+    def __init__(self, fields):
+        self.fields = fields
+
+    def __getitem__(self, key):
+        return self.fields[key]()
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def __len__(self):
+        return len(self.fields)
+
+
+class PeopleView(Mapping):
+    """
+    Read-only view of a Graph shaped like the people dict of degrees.py:
+    {person_id: {"name": ..., "birth": ..., "movies": {movie_id, ...}}}
+    """
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        p = self.graph.person_index(person_id)
+        if p is None:
+            raise KeyError(person_id)
+        graph = self.graph
+        return Record({
+            "name": lambda: graph.names[p],
+            "birth": lambda: graph.births[p],
+            "movies": lambda: {graph.movie_id(m) for m in graph.movies_for_person(p)}
+        })
+
+    def __iter__(self):
+        return (str(person_id) for person_id in self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+
+class MoviesView(Mapping):
+    """
+    Read-only view of a Graph shaped like the movies dict of degrees.py:
+    {movie_id: {"title": ..., "year": ..., "stars": {person_id, ...}}}
+    """
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        m = self.graph.movie_index(movie_id)
+        if m is None:
+            raise KeyError(movie_id)
+        graph = self.graph
+        return Record({
+            "title": lambda: graph.titles[m],
+            "year": lambda: graph.years[m],
+            "stars": lambda: {graph.person_id(p) for p in graph.stars_for_movie(m)}
+        })
+
+    def __iter__(self):
+        return (str(movie_id) for movie_id in self.graph.movie_ids)
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
+
+
+class NamesView(Mapping):
+    """
+    Read-only view of a Graph shaped like the names dict of degrees.py:
+    {lowercased name: {person_id, ...}}
+    """
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, name):
+        found = self.graph.people_named(name)
+        if not found or name != name.lower():
+            raise KeyError(name)
+        return {self.graph.person_id(p) for p in found}
+
+    def __iter__(self):
+        lower_names = LowerNames(self.graph)
+        previous = None
+        for k in range(len(lower_names)):
+            name = lower_names[k]
+            if name != previous:
+                yield name
+                previous = name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+def find(ids, value):
+    """
+    Returns the position of IMDB id value in the sorted ids, or None.
+    """
+    try:
+        value = int(value)
+    except ValueError:
+        return None
+    i = bisect_left(ids, value)
+    if i < len(ids) and ids[i] == value:
+        return i
+    return None
+
+
+def compress(count, rows, columns):
+    """
+    Groups the (rows[i], columns[i]) pairs by row,
+    returning CSR offsets and the columns in row order.
+    """
+    offsets = array("q", [0]) * (count + 1)
+    for row in rows:
+        offsets[row + 1] += 1
+    for i in range(count):
+        offsets[i + 1] += offsets[i]
+
+    grouped = array("i", [0]) * len(columns)
+    position = array("q", offsets[:-1])
+    for row, column in zip(rows, columns):
+        grouped[position[row]] = column
+        position[row] += 1
+    return offsets, grouped
+
+
+def load_graph(directory):
+    """
+    Load data from CSV files into a Graph.
+    """
+    # Load people, ordered by id
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)
+        people = sorted((int(row[0]), row[1], row[2]) for row in reader)
+
+    # Load movies, ordered by id
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)
+        movies = sorted((int(row[0]), row[1], row[2]) for row in reader)
+
+    person_ids = array("q", (person[0] for person in people))
+    movie_ids = array("q", (movie[0] for movie in movies))
+    names = StringTable.build(person[1] for person in people)
+    births = StringTable.build(person[2] for person in people)
+    titles = StringTable.build(movie[1] for movie in movies)
+    years = StringTable.build(movie[2] for movie in movies)
+    name_order = array("i", sorted(range(len(people)), key=lambda p: people[p][1].lower()))
+    del people, movies
+
+    # Load stars as person * movie_count + movie keys
+    movie_count = len(movie_ids)
+    keys = array("q")
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader)
+        for row in reader:
+            p = find(person_ids, row[0])
+            m = find(movie_ids, row[1])
+            if p is not None and m is not None:
+                keys.append(p * movie_count + m)
+
+    # Sorting groups the stars by person, then drop duplicate rows
+    stars_people = array("i")
+    stars_movies = array("i")
+    previous = -1
+    for key in sorted(keys):
+        if key != previous:
+            stars_people.append(key // movie_count)
+            stars_movies.append(key % movie_count)
+            previous = key
+    del keys
+
+    person_offsets, person_movies = compress(len(person_ids), stars_people, stars_movies)
+    movie_offsets, movie_stars = compress(movie_count, stars_movies, stars_people)
+
+    return Graph(person_ids, movie_ids,
+                 person_offsets, person_movies,
+                 movie_offsets, movie_stars,
+                 names, births, titles, years, name_order)
@@ -0,0 +1,259 @@
+import math
+import os
+import struct
+import sys
+from array import array
+
+from snapshot import SOURCES, load_cached_graph, source_key
+from util import bidirectional_search
+
+# Distance stored for people a landmark cannot reach
+UNREACHABLE = 255
+# Distance stored for people this far or farther from a landmark
+FAR = UNREACHABLE - 1
+
+# Landmarks checked for every person reached by the pruned search
+PRUNING_LANDMARKS = 4
+
+# Checking landmarks for every person costs more than it saves unless
+# the level is big and the bounds are close to the answer
+PRUNING_FRONTIER = 256
+PRUNING_GAP = 1
+
+VERSION = 1
+MAGIC = b"LANDMARK"
+# magic, version, k, people, then size and mtime of every source file
+HEADER = struct.Struct("<8sIII" + "qq" * len(SOURCES))
+
+
+class LandmarkIndex():
+    """
+    Degrees of separation from k well-connected landmark people to
+    everyone else, one byte per landmark and person.
+
+    By the triangle inequality, for any landmark L
+        |d(L, s) - d(L, t)| <= d(s, t) <= d(L, s) + d(L, t)
+    so the index bounds the degrees between any two people without
+    searching, and those bounds prune the exact search.
+    """
+    def __init__(self, graph, landmarks, distances):
+        self.graph = graph
+        self.landmarks = landmarks
+        # distances[i * people + p] is the distance from landmark i to p
+        self.distances = distances
+        self.people = len(graph.person_ids)
+
+        # One row of distances per landmark, and the farthest
+        # distance in each row, without copying the distances
+        view = memoryview(distances)
+        self.rows = [view[i * self.people:(i + 1) * self.people] for i in range(len(landmarks))]
+        self.eccentricities = [
+            max(bytes(row).translate(None, bytes([UNREACHABLE])), default=0)
+            for row in self.rows
+        ]
+
+    @classmethod
+    def build(cls, graph, k=16):
+        """
+        Picks k landmarks among the people with the most co-stars,
+        skipping direct co-stars of landmarks already picked, and runs
+        one breadth-first search from each.
+        """
+        people = len(graph.person_ids)
+        degree = sorted(
+            range(people),
+            key=lambda p: sum(len(graph.stars_for_movie(m)) for m in graph.movies_for_person(p)),
+            reverse=True
+        )
+
+        landmarks = array("i")
+        covered = set()
+        for p in degree:
+            if len(landmarks) == k:
+                break
+            if p in covered:
+                continue
+            landmarks.append(p)
+            for _, q in graph.neighbors_for_person(p):
+                covered.add(q)
+
+        distances = array("B")
+        for landmark in landmarks:
+            distances.extend(distances_from(graph, landmark))
+        return cls(graph, landmarks, distances)
+
+    def save(self, path, key):
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(self.landmarks), self.people, *key))
+            self.landmarks.tofile(f)
+            self.distances.tofile(f)
+
+    @classmethod
+    def load(cls, graph, path, key):
+        """
+        Returns the index saved at path for graph, or None if it is
+        missing or was built from other source files than key.
+        """
+        try:
+            with open(path, "rb") as f:
+                magic, version, k, people, *stored_key = HEADER.unpack(f.read(HEADER.size))
+                if (magic, version, people, stored_key) != (MAGIC, VERSION, len(graph.person_ids), key):
+                    return None
+                landmarks = array("i")
+                landmarks.fromfile(f, k)
+                distances = array("B")
+                distances.fromfile(f, k * people)
+        except (OSError, EOFError, struct.error):
+            return None
+        return cls(graph, landmarks, distances)
+
+    def index_bounds(self, s, t):
+        """
+        Returns (lower, upper) bounds on the degrees of separation
+        between person indices s and t.
+
+        Bounds that are unknown are math.inf; a lower bound of math.inf
+        means the two people are not connected.
+        """
+        if s == t:
+            return 0, 0
+        lower = 0
+        upper = math.inf
+        for row in self.rows:
+            ds = row[s]
+            dt = row[t]
+            if ds == UNREACHABLE and dt == UNREACHABLE:
+                continue
+            if ds == UNREACHABLE or dt == UNREACHABLE:
+                return math.inf, math.inf
+            lower = max(lower, abs(ds - dt))
+            if ds != FAR and dt != FAR:
+                upper = min(upper, ds + dt)
+        return lower, upper
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees of separation
+        between two IMDB person ids, or None if either is unknown.
+        """
+        s = self.graph.person_index(source)
+        t = self.graph.person_index(target)
+        if s is None or t is None:
+            return None
+        return self.index_bounds(s, t)
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, given their IMDB ids.
+
+        If no possible path, returns None.
+        """
+        return self.graph.shortest_path(source, target, self.index_path)
+
+    def index_path(self, s, t):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        that connect person s to person t, or None.
+
+        Like Graph.index_path, but people the landmarks show are not
+        connected are answered without searching, and on big levels, when
+        the bounds for (s, t) are tight, the search never grows from a
+        person whose depth plus lower bound to the other end exceeds the
+        upper bound: such a person cannot be on a shortest path.
+        """
+        lower, upper = self.index_bounds(s, t)
+        if lower == math.inf:
+            return None
+        if s == t:
+            return []
+        if upper - lower > PRUNING_GAP:
+            return self.graph.index_path(s, t)
+
+        def prune(frontier, forward, depth):
+            if len(frontier) < PRUNING_FRONTIER:
+                return None
+
+            # Landmark distances of the other end, best landmarks first:
+            # the largest lower bound a landmark can give is max(d, e - d)
+            # for eccentricity e, so only the few with the most room are
+            # worth checking, and none while the depth leaves more slack
+            goal = t if forward else s
+            goal_distances = sorted(
+                (
+                    (max(row[goal], e - row[goal]), row, row[goal])
+                    for row, e in zip(self.rows, self.eccentricities)
+                    if row[goal] != UNREACHABLE
+                ),
+                key=lambda item: item[0],
+                reverse=True
+            )[:PRUNING_LANDMARKS]
+            if not any(depth + largest > upper for largest, _, _ in goal_distances):
+                return None
+            return lambda q: not any(
+                depth + abs(row[q] - d) > upper for _, row, d in goal_distances
+            )
+
+        return bidirectional_search(s, t, self.graph.neighbors_for_person, prune)
+
+
+def distances_from(graph, source):
+    """
+    Returns the degrees of separation from source to every person,
+    UNREACHABLE for people not connected to source.
+    """
+    distances = array("B", [UNREACHABLE]) * len(graph.person_ids)
+    distances[source] = 0
+    frontier = [source]
+    depth = 0
+    while frontier:
+        depth = min(depth + 1, FAR)
+        next_frontier = []
+        for p in frontier:
+            for m in graph.movies_for_person(p):
+                for q in graph.stars_for_movie(m):
+                    if distances[q] == UNREACHABLE:
+                        distances[q] = depth
+                        next_frontier.append(q)
+        frontier = next_frontier
+    return distances
+
+
+def landmarks_path(directory):
+    return os.path.join(directory, "degrees.landmarks")
+
+
+def load_index(directory, k=16, graph=None):
+    """
+    Returns the LandmarkIndex for directory, building and saving it
+    if there is none yet. Pass the graph of directory if it is
+    already loaded.
+    """
+    if graph is None:
+        graph = load_cached_graph(directory)
+    path = landmarks_path(directory)
+    key = source_key(directory)
+    index = LandmarkIndex.load(graph, path, key)
+    if index is None:
+        index = LandmarkIndex.build(graph, k)
+        try:
+            index.save(path, key)
+        except OSError:
+            pass
+    return index
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python landmarks.py directory [k]")
+    directory = sys.argv[1]
+    k = int(sys.argv[2]) if len(sys.argv) == 3 else 16
+
+    graph = load_cached_graph(directory)
+    index = LandmarkIndex.build(graph, k)
+    index.save(landmarks_path(directory), source_key(directory))
+    print(f"Saved {len(index.landmarks)} landmarks to {landmarks_path(directory)}")
+
+
+if __name__ == "__main__":
+    main()
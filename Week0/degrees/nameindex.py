@@ -0,0 +1,342 @@
+import heapq
+import itertools
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+
+# Runs of letters and digits
+WORD = re.compile(r"[^\W_]+")
+
+# Sorts after every character, so word + LAST_CHARACTER bounds the
+# words starting with word
+LAST_CHARACTER = chr(0x10FFFF)
+
+# Costs of matching a query word against a name token
+EXACT = 0
+PREFIX = 1
+TYPO = 2
+
+
+def normalize(name):
+    """
+    Returns the lowercased words of a name, without accents or punctuation.
+    """
+    name = name.lower()
+    if not name.isascii():
+        name = "".join(
+            c for c in unicodedata.normalize("NFKD", name)
+            if not unicodedata.combining(c)
+        )
+    return WORD.findall(name)
+
+
+def deletions(token):
+    """
+    Returns the token and every string made by deleting one character.
+    """
+    return {token} | {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def within_one_edit(a, b):
+    """
+    Checks if a can be turned into b by at most one insertion,
+    deletion, substitution or swap of adjacent characters.
+    """
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    i = 0
+    while i < min(len(a), len(b)) and a[i] == b[i]:
+        i += 1
+    return (a[i + 1:] == b[i + 1:]
+            or a[i + 1:] == b[i:]
+            or a[i:] == b[i + 1:]
+            or (a[i + 1:i + 2] == b[i:i + 1] and a[i:i + 1] == b[i + 1:i + 2]
+                and a[i + 2:] == b[i + 2:]))
+
+
+class NameIndex():
+    """
+    Word-level index of people's names for prefix and typo-tolerant lookup.
+
+    Every word of every name has a posting list of the people using it.
+    Words are numbered in sorted order, so the words the last query word
+    is a prefix of are a run of numbers, found by bisecting the sorted
+    words. Any query word may be one edit away, found through a table of
+    the words with one character deleted.
+    """
+    def __init__(self, people):
+        """
+        Builds the index from (person_id, name, weight) triples;
+        people with a higher weight rank first among equal matches.
+        """
+        self.person_ids = []
+        self.names = []
+        postings = {}
+
+        # Words are numbered as they are first seen, then renumbered below
+        seen_ids = {}
+        person_tokens = array("i")
+        self.token_offsets = array("q", [0])
+
+        # People are numbered best first, so every posting list is in rank order
+        people = sorted(people, key=lambda person: (-person[2], person[1]))
+        for p, (person_id, name, weight) in enumerate(people):
+            self.person_ids.append(person_id)
+            self.names.append(name)
+            for token in set(normalize(name)):
+                postings.setdefault(token, array("i")).append(p)
+                person_tokens.append(seen_ids.setdefault(token, len(seen_ids)))
+            self.token_offsets.append(len(person_tokens))
+
+        self.tokens = sorted(postings)
+        self.token_ids = {token: k for k, token in enumerate(self.tokens)}
+        renumbered = array("i", [0]) * len(seen_ids)
+        for token, k in seen_ids.items():
+            renumbered[k] = self.token_ids[token]
+
+        # The words of person p are
+        # person_tokens[token_offsets[p]:token_offsets[p + 1]]
+        self.person_tokens = array("i", map(renumbered.__getitem__, person_tokens))
+
+        # Postings of word k, the best person using it, and the number of
+        # postings of the words before it
+        self.postings = [postings[token] for token in self.tokens]
+        self.firsts = array("i", (posting[0] for posting in self.postings))
+        self.posting_starts = array(
+            "q", itertools.accumulate(map(len, self.postings), initial=0)
+        )
+
+        self.deleted = {}
+        for k, token in enumerate(self.tokens):
+            for variant in deletions(token):
+                self.deleted.setdefault(variant, []).append(k)
+
+    def matching_tokens(self, word, prefix):
+        """
+        Returns the words matching a query word as a pair: a dict of the
+        numbers of the exact and typo matches with their costs, and the
+        range of numbers of the words that start with the query word,
+        empty unless prefix.
+        """
+        costs = {}
+        for variant in deletions(word):
+            for k in self.deleted.get(variant, []):
+                if within_one_edit(word, self.tokens[k]):
+                    costs[k] = TYPO
+
+        span = range(0)
+        if prefix:
+            span = range(
+                bisect_left(self.tokens, word),
+                bisect_left(self.tokens, word + LAST_CHARACTER)
+            )
+            # Starting with the word is cheaper than a typo
+            costs = {k: cost for k, cost in costs.items() if k not in span}
+
+        k = self.token_ids.get(word)
+        if k is not None:
+            costs[k] = EXACT
+        return costs, span
+
+    def match_size(self, match):
+        """
+        Returns the number of postings of the words in match.
+        """
+        costs, span = match
+        return (sum(len(self.postings[k]) for k in costs if k not in span)
+                + self.posting_starts[span.stop] - self.posting_starts[span.start])
+
+    def match_tiers(self, match):
+        """
+        Returns (cost, words, postings) triples for the words in match,
+        cheapest first, with the number of postings of the words.
+        A word may be in more than one tier.
+        """
+        costs, span = match
+        tiers = {}
+        for k, cost in costs.items():
+            tiers.setdefault(cost, []).append(k)
+        tiers = [
+            (cost, tokens, sum(len(self.postings[k]) for k in tokens))
+            for cost, tokens in tiers.items()
+        ]
+        if span:
+            size = self.posting_starts[span.stop] - self.posting_starts[span.start]
+            tiers.append((PREFIX, span, size))
+        return sorted(tiers, key=lambda tier: tier[0])
+
+    def merged(self, tokens):
+        """
+        Yields the people using each of tokens in rank order, or more than
+        once if they use several. A posting list joins the merge only once
+        it reaches the best person of that list, so taking the first few
+        people of thousands of words stays cheap.
+        """
+        postings = self.postings
+        waiting = list(zip(map(self.firsts.__getitem__, tokens), tokens))
+        heapq.heapify(waiting)
+        merging = []
+        while waiting or merging:
+            while waiting and (not merging or waiting[0][0] < merging[0][0]):
+                p, k = heapq.heappop(waiting)
+                heapq.heappush(merging, (p, k, 0))
+            p, k, i = merging[0]
+            yield p
+            if i + 1 < len(postings[k]):
+                heapq.heapreplace(merging, (postings[k][i + 1], k, i + 1))
+            else:
+                heapq.heappop(merging)
+
+    def cost_tiers(self, match):
+        """
+        Returns a dict mapping each cost to the set of people
+        whose best matching word has that cost.
+        """
+        tiers = {}
+        seen = set()
+        for cost, tokens, size in self.match_tiers(match):
+            tier = set().union(*(self.postings[k] for k in tokens))
+            tier -= seen
+            seen |= tier
+            tiers[cost] = tier
+        return tiers
+
+    def word_cost(self, p, match):
+        """
+        Returns the cost of the best of person p's words in match,
+        or None if none of them match.
+        """
+        costs, span = match
+        best = None
+        for k in self.person_tokens[self.token_offsets[p]:self.token_offsets[p + 1]]:
+            cost = costs.get(k)
+            if cost is None and k in span:
+                cost = PREFIX
+            if cost is not None and (best is None or cost < best):
+                best = cost
+        return best
+
+    def word_costs(self, p, matches):
+        """
+        Returns a tuple of the costs of person p's best match for each
+        of matches, or None if any of them has no match.
+        """
+        costs = []
+        for match in matches:
+            cost = self.word_cost(p, match)
+            if cost is None:
+                return None
+            costs.append(cost)
+        return tuple(costs)
+
+    def walk(self, matches, limit, budget):
+        """
+        Returns the best limit people matching every word, or None if
+        finding them takes walking more than budget people.
+
+        People are found a total cost at a time. For each way of splitting
+        the total between the words, the people of the word's tier with the
+        fewest postings are walked in rank order and their words checked,
+        stopping once there are enough.
+        """
+        tiers = [self.match_tiers(match) for match in matches]
+        if not all(tiers):
+            return []
+
+        # Costs of the people checked so far, as they may come up again
+        # in the walks of other splits
+        known = {}
+        ranked = []
+        walked = 0
+        for total in range(sum(tier[-1][0] for tier in tiers) + 1):
+            need = limit - len(ranked)
+            found = []
+            for split in itertools.product(*tiers):
+                costs = tuple(cost for cost, tokens, size in split)
+                if sum(costs) != total:
+                    continue
+                cost, tokens, size = min(split, key=lambda tier: tier[2])
+                matched = 0
+                last = None
+                for p in self.merged(tokens):
+                    walked += 1
+                    if walked > budget:
+                        return None
+                    if p == last:
+                        continue
+                    last = p
+                    if p not in known:
+                        known[p] = self.word_costs(p, matches)
+                    # Each person counts for the split of their best costs only
+                    if known[p] == costs:
+                        found.append(p)
+                        matched += 1
+                        if matched == need:
+                            break
+            ranked.extend(heapq.nsmallest(need, found))
+            if len(ranked) == limit:
+                break
+        return ranked
+
+    def intersect(self, matches, sizes, limit):
+        """
+        Returns the best limit people matching every word,
+        intersecting the sets of people at each cost.
+        """
+        totals = self.cost_tiers(matches[0])
+        for match, size in zip(matches[1:], sizes[1:]):
+            combined = {}
+            if sum(map(len, totals.values())) * 16 < size:
+                # Few people left: check their words rather than the postings
+                for total, people in totals.items():
+                    for p in people:
+                        cost = self.word_cost(p, match)
+                        if cost is not None:
+                            combined.setdefault(total + cost, set()).add(p)
+            else:
+                tiers = self.cost_tiers(match)
+                for total, people in totals.items():
+                    for cost, tier in tiers.items():
+                        both = people & tier
+                        if both:
+                            combined.setdefault(total + cost, set()).update(both)
+            totals = combined
+
+        ranked = []
+        for total in sorted(totals):
+            ranked.extend(heapq.nsmallest(limit - len(ranked), totals[total]))
+            if len(ranked) == limit:
+                break
+        return ranked
+
+    def search(self, query, limit=10):
+        """
+        Returns up to limit (person_id, name) pairs best matching query.
+
+        People must match every query word; the last one may be the start
+        of a word. Matches rank by total cost (exact, prefix, then one typo
+        per word), then by weight.
+        """
+        words = normalize(query)
+        if not words or limit <= 0:
+            return []
+
+        matches = [
+            self.matching_tokens(word, prefix=i == len(words) - 1)
+            for i, word in enumerate(words)
+        ]
+        sizes = [self.match_size(match) for match in matches]
+        order = sorted(range(len(words)), key=lambda i: sizes[i])
+        matches = [matches[i] for i in order]
+        sizes = [sizes[i] for i in order]
+
+        # Walking usually stops after a few people, but checks each one's
+        # words in Python; once it has walked about as many as intersecting
+        # would take postings / 32 per word, intersect instead
+        ranked = self.walk(matches, limit, sum(sizes) // (32 * len(words)))
+        if ranked is None:
+            ranked = self.intersect(matches, sizes, limit)
+        return [(self.person_ids[p], self.names[p]) for p in ranked]
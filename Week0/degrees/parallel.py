@@ -0,0 +1,145 @@
+import multiprocessing
+import os
+from array import array
+
+from snapshot import load_cached_graph, read_snapshot, snapshot_path, source_key
+from util import bidirectional_search
+
+# Marks in the shared visited array
+FORWARD = 1
+BACKWARD = 2
+
+# Levels with fewer people than this are expanded without the pool
+SERIAL_LEVEL = 2048
+
+# Set in every worker by attach()
+worker_graph = None
+worker_visited = None
+
+
+def attach(path, key, visited):
+    """
+    Pool initializer: maps the graph snapshot, whose pages are shared
+    with every other process, and keeps the shared visited marks.
+    """
+    global worker_graph, worker_visited
+    worker_graph = read_snapshot(path, key)
+    worker_visited = memoryview(visited).cast("B")
+
+
+def expand(chunk, mark):
+    """
+    Returns (movie, person, parent) triples, flattened into an array,
+    for every co-star of the people in chunk not yet marked by this side.
+    """
+    frontier = array("i")
+    frontier.frombytes(chunk)
+    return expand_with(worker_graph, worker_visited, frontier, mark).tobytes()
+
+
+def expand_with(graph, visited, frontier, mark):
+    """
+    Returns the (movie, person, parent) triples of expand for a frontier.
+    """
+    found = array("i")
+    seen = set()
+    for p in frontier:
+        for m in graph.movies_for_person(p):
+            for q in graph.stars_for_movie(m):
+                if not visited[q] & mark and q not in seen:
+                    seen.add(q)
+                    found.extend((m, q, p))
+    return found
+
+
+class ParallelSearch():
+    """
+    Bidirectional breadth-first search over the memory-mapped graph that
+    expands each large level across a pool of worker processes.
+
+    The search is level-synchronous: the parent splits the frontier into
+    chunks, the workers return the co-stars of their chunk not yet
+    visited from that side, and the parent merges them. Before expanding
+    a frontier the parent marks it in a visited array shared with the
+    workers.
+    """
+    def __init__(self, directory, workers=None):
+        self.graph = load_cached_graph(directory)
+        self.workers = workers or os.cpu_count()
+        people = len(self.graph.person_ids)
+        self.shared = multiprocessing.RawArray("B", people)
+        self.visited = memoryview(self.shared).cast("B")
+
+        # Workers map the snapshot, so without one (say, in a read-only
+        # data directory) every level is expanded here instead
+        path = snapshot_path(directory)
+        key = source_key(directory)
+        if self.workers > 1 and read_snapshot(path, key) is None:
+            self.workers = 1
+
+        self.pool = None
+        if self.workers > 1:
+            self.pool = multiprocessing.Pool(
+                self.workers,
+                initializer=attach,
+                initargs=(path, key, self.shared)
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, given their IMDB ids.
+
+        If no possible path, returns None.
+        """
+        return self.graph.shortest_path(source, target, self.index_path)
+
+    def index_path(self, s, t):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        that connect person s to person t, or None.
+        """
+        visited = self.visited
+        visited[:] = bytes(len(visited))
+
+        def expand(frontier, forward):
+            # Everyone reached on this side so far has been in one of its
+            # frontiers, so marking the frontiers keeps the marks complete
+            mark = FORWARD if forward else BACKWARD
+            for p in frontier:
+                visited[p] |= mark
+            found = {}
+            for triples in self.expand_level(frontier, mark):
+                for i in range(0, len(triples), 3):
+                    found.setdefault(triples[i + 2], []).append((triples[i], triples[i + 1]))
+            return lambda p: found.get(p, ())
+
+        return bidirectional_search(s, t, self.graph.neighbors_for_person, expand=expand)
+
+    def expand_level(self, frontier, mark):
+        """
+        Yields arrays of (movie, person, parent) triples for the unvisited
+        co-stars of the frontier, in parallel when the level is large.
+        """
+        if self.workers == 1 or len(frontier) < SERIAL_LEVEL:
+            yield expand_with(self.graph, self.visited, frontier, mark)
+            return
+
+        # A few chunks per worker keeps them busy when degrees vary
+        size = -(-len(frontier) // (4 * self.workers))
+        chunks = [array("i", frontier[i:i + size]).tobytes() for i in range(0, len(frontier), size)]
+        for data in self.pool.starmap(expand, [(chunk, mark) for chunk in chunks]):
+            found = array("i")
+            found.frombytes(data)
+            yield found
@@ -0,0 +1,148 @@
+import mmap
+import os
+import struct
+import sys
+
+from graph import Graph, StringTable, load_graph
+
+# Bump whenever the layout below changes, so old snapshots get rebuilt
+VERSION = 1
+MAGIC = b"DEGREES\0"
+
+SOURCES = ["people.csv", "movies.csv", "stars.csv"]
+
+# Every array of a Graph, in file order, with its typecode
+SECTIONS = [
+    ("person_ids", "q"),
+    ("movie_ids", "q"),
+    ("person_offsets", "q"),
+    ("person_movies", "i"),
+    ("movie_offsets", "q"),
+    ("movie_stars", "i"),
+    ("names.blob", "B"),
+    ("names.offsets", "q"),
+    ("births.blob", "B"),
+    ("births.offsets", "q"),
+    ("titles.blob", "B"),
+    ("titles.offsets", "q"),
+    ("years.blob", "B"),
+    ("years.offsets", "q"),
+    ("name_order", "i")
+]
+
+# magic, version, byte order, then size and mtime of every source file
+HEADER = struct.Struct("<8sI8s" + "qq" * len(SOURCES))
+# offset and size in bytes of every section
+TABLE = struct.Struct("<" + "qq" * len(SECTIONS))
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, "degrees.snapshot")
+
+
+def source_key(directory):
+    """
+    Returns the sizes and modification times of the CSV files,
+    which a snapshot must match to be used.
+    """
+    key = []
+    for source in SOURCES:
+        stat = os.stat(os.path.join(directory, source))
+        key.extend([stat.st_size, stat.st_mtime_ns])
+    return key
+
+
+def byte_order():
+    return sys.byteorder.encode().ljust(8, b"\0")
+
+
+def section(graph, name):
+    """
+    Returns the array or bytes stored under a section name.
+    """
+    if "." in name:
+        table, part = name.split(".")
+        return getattr(getattr(graph, table), part)
+    return getattr(graph, name)
+
+
+def write_snapshot(graph, path, key):
+    """
+    Writes the graph to path, replacing any older snapshot atomically.
+    """
+    offsets = []
+    position = HEADER.size + TABLE.size
+    for name, _ in SECTIONS:
+        # Keep every section 8-byte aligned for the memoryview casts
+        position += -position % 8
+        size = memoryview(section(graph, name)).nbytes
+        offsets.extend([position, size])
+        position += size
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, byte_order(), *key))
+        f.write(TABLE.pack(*offsets))
+        for i, (name, _) in enumerate(SECTIONS):
+            f.write(b"\0" * (offsets[2 * i] - f.tell()))
+            f.write(memoryview(section(graph, name)).cast("B"))
+    os.replace(temporary, path)
+
+
+def read_snapshot(path, key):
+    """
+    Memory-maps the snapshot at path and returns a Graph reading from it,
+    or None if the snapshot is missing or out of date.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(data) < HEADER.size + TABLE.size:
+        return None
+    magic, version, order, *stored_key = HEADER.unpack_from(data, 0)
+    if (magic, version, order, stored_key) != (MAGIC, VERSION, byte_order(), key):
+        return None
+
+    view = memoryview(data)
+    offsets = TABLE.unpack_from(data, HEADER.size)
+    sections = {}
+    for i, (name, typecode) in enumerate(SECTIONS):
+        start, size = offsets[2 * i], offsets[2 * i + 1]
+        sections[name] = view[start:start + size].cast(typecode)
+
+    return Graph(
+        sections["person_ids"], sections["movie_ids"],
+        sections["person_offsets"], sections["person_movies"],
+        sections["movie_offsets"], sections["movie_stars"],
+        StringTable(sections["names.blob"], sections["names.offsets"]),
+        StringTable(sections["births.blob"], sections["births.offsets"]),
+        StringTable(sections["titles.blob"], sections["titles.offsets"]),
+        StringTable(sections["years.blob"], sections["years.offsets"]),
+        sections["name_order"]
+    )
+
+
+def load_cached_graph(directory):
+    """
+    Returns the Graph for directory, memory-mapped from its snapshot.
+
+    The snapshot is (re)built from the CSV files when it is missing
+    or older than them.
+    """
+    path = snapshot_path(directory)
+    key = source_key(directory)
+
+    graph = read_snapshot(path, key)
+    if graph is not None:
+        return graph
+
+    graph = load_graph(directory)
+    try:
+        write_snapshot(graph, path, key)
+    except OSError:
+        # Read-only data directory, carry on without a cache
+        return graph
+    return read_snapshot(path, key) or graph
@@ -1,3 +1,6 @@
+from collections import deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -7,13 +10,16 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        # Number of nodes in the frontier for each state
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -22,10 +28,17 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self.discard(node.state)
             return node
 
+    def discard(self, state):
+        count = self.states[state] - 1
+        if count:
+            self.states[state] = count
+        else:
+            del self.states[state]
+
 
 class QueueFrontier(StackFrontier):
 
@@ -33,6 +46,95 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self.discard(node.state)
             return node
+
+
+def join_paths(forward, backward, meeting):
+    """
+    Returns the (action, state) pairs from the source to the target
+    through meeting, given the parents found by a bidirectional search.
+    """
+    # Walk back from the meeting state to the source
+    solution = []
+    state = meeting
+    while forward[state] is not None:
+        action, parent = forward[state]
+        solution.append((action, state))
+        state = parent
+    solution.reverse()
+
+    # Walk on from the meeting state to the target
+    state = meeting
+    while backward[state] is not None:
+        action, state = backward[state]
+        solution.append((action, state))
+
+    return solution
+
+
+def bidirectional_search(source, target, neighbors, prune=None, expand=None):
+    """
+    Returns the (action, state) pairs from the source to the target,
+    searching breadth-first from both ends and meeting in the middle,
+    or None if there is no path.
+
+    The smaller frontier always grows by one whole level, from the
+    (action, state) pairs neighbors(state) returns for its states.
+
+    If given, prune(frontier, forward, depth) is asked once per level,
+    forward being True for the frontier that started at the source and
+    depth how far the new states are from their end, and returns None or
+    a function telling if a new state is worth growing the search from.
+
+    If given, expand(frontier, forward) is called before each level and
+    returns the neighbors function to grow it with, so a whole level can
+    be worked out at once.
+    """
+    if source == target:
+        return []
+
+    # Maps each reached state to the (action, state) step
+    # that leads one state closer to the source (or to the target)
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+    forward_depth = 0
+    backward_depth = 0
+
+    while forward_frontier and backward_frontier:
+        growing_forward = len(forward_frontier) <= len(backward_frontier)
+        if growing_forward:
+            frontier, parents, other_parents = forward_frontier, forward, backward
+            forward_depth += 1
+            depth = forward_depth
+        else:
+            frontier, parents, other_parents = backward_frontier, backward, forward
+            backward_depth += 1
+            depth = backward_depth
+
+        keep = prune(frontier, growing_forward, depth) if prune is not None else None
+        level_neighbors = expand(frontier, growing_forward) if expand is not None else neighbors
+
+        next_frontier = []
+        for parent in frontier:
+            for action, state in level_neighbors(parent):
+                if state in parents:
+                    continue
+                parents[state] = (action, parent)
+
+                # Both searches only ever stop at whole levels, so the
+                # first state reached from both sides is on a shortest path
+                if state in other_parents:
+                    return join_paths(forward, backward, state)
+                if keep is None or keep(state):
+                    next_frontier.append(state)
+
+        if growing_forward:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    return None
@@ -0,0 +1,181 @@
+import math
+import sys
+import time
+
+import bitboard
+import book
+import tictactoe as ttt
+
+
+def reference_minimax(board):
+    """
+    The plain minimax search tictactoe.minimax used before alpha-beta
+    pruning and the transposition table, kept to compare against.
+    """
+    def maxValue(newBoard):
+        v = -math.inf
+        if ttt.terminal(newBoard):
+            return ttt.utility(newBoard)
+        for action in ttt.actions(newBoard):
+            v = max(v, minValue(ttt.result(newBoard, action)))
+        return v
+
+    def minValue(newBoard):
+        v = math.inf
+        if ttt.terminal(newBoard):
+            return ttt.utility(newBoard)
+        for action in ttt.actions(newBoard):
+            v = min(v, maxValue(ttt.result(newBoard, action)))
+        return v
+
+    if ttt.player(board) == ttt.X:
+        best_score = -math.inf
+        for action in ttt.actions(board):
+            score = minValue(ttt.result(board, action))
+            if score > best_score:
+                best_score = score
+                best_action = action
+                if best_score == 1:
+                    return action
+    else:
+        best_score = math.inf
+        for action in ttt.actions(board):
+            score = maxValue(ttt.result(board, action))
+            if score < best_score:
+                best_score = score
+                best_action = action
+                if best_score == -1:
+                    return action
+
+    return best_action
+
+
+class Counter():
+    """
+    Counts the positions a search visits by wrapping tictactoe.terminal,
+    which both searches call once per position.
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.terminal = ttt.terminal
+
+    def __enter__(self):
+        def counting_terminal(board):
+            self.nodes += 1
+            return self.terminal(board)
+        ttt.terminal = counting_terminal
+        return self
+
+    def __exit__(self, *exc):
+        ttt.terminal = self.terminal
+
+
+def measure(search, board):
+    """
+    Returns the action search picks on board, the positions it visited
+    and its latency in seconds.
+    """
+    with Counter() as counter:
+        start = time.perf_counter()
+        action = search(board)
+        elapsed = time.perf_counter() - start
+    return action, counter.nodes, elapsed
+
+
+def search_benchmark():
+    """
+    Plays one game of the engine against itself, timing every move with
+    the reference search, alpha-beta with an empty table and alpha-beta
+    keeping its table for the whole game.
+    """
+    board = ttt.initial_state()
+    ttt.transpositions.clear()
+    warm = {}
+    totals = [[0, 0.0], [0, 0.0], [0, 0.0]]
+    print(f"{'move':>4} {'player':>6}  {'reference':>22}  {'alpha-beta':>22}  {'alpha-beta, kept table':>22}")
+    while not ttt.terminal(board):
+        _, old_nodes, old_time = measure(reference_minimax, board)
+        ttt.transpositions.clear()
+        _, cold_nodes, cold_time = measure(ttt.search, board)
+        ttt.transpositions.clear()
+        ttt.transpositions.update(warm)
+        action, warm_nodes, warm_time = measure(ttt.search, board)
+        warm = dict(ttt.transpositions)
+
+        rows = [(old_nodes, old_time), (cold_nodes, cold_time), (warm_nodes, warm_time)]
+        for total, (nodes, elapsed) in zip(totals, rows):
+            total[0] += nodes
+            total[1] += elapsed
+        print(f"{action!s:>10} {ttt.player(board):>1}  " + "  ".join(
+            f"{nodes:8} nodes {1000 * elapsed:8.2f} ms" for nodes, elapsed in rows
+        ))
+        board = ttt.result(board, action)
+
+    print(f"{'total':>12}  " + "  ".join(
+        f"{nodes:8} nodes {1000 * elapsed:8.2f} ms" for nodes, elapsed in totals
+    ))
+    print("Winner:", ttt.winner(board))
+
+
+def full_tree(engine, state):
+    """
+    Returns the minimax value of state and the number of positions in its
+    game tree, searched without pruning through the engine's functions.
+    """
+    if engine.terminal(state):
+        return engine.utility(state), 1
+    values = []
+    nodes = 1
+    for action in engine.actions(state):
+        v, n = full_tree(engine, engine.result(state, action))
+        values.append(v)
+        nodes += n
+    return (max(values) if engine.player(state) == engine.X else min(values)), nodes
+
+
+def engine_benchmark():
+    """
+    Compares the list and bitboard engines on a full game tree search and
+    on a first move from the empty board, then against the opening book.
+    """
+    book.loaded = {}
+    for name, engine in [("lists", ttt), ("bitboard", bitboard)]:
+        start = time.perf_counter()
+        v, nodes = full_tree(engine, engine.initial_state())
+        elapsed = time.perf_counter() - start
+        print(f"{name:>8}: full tree {nodes} nodes, value {v}, "
+              f"{elapsed:6.2f} s, {nodes / elapsed:9.0f} nodes/s")
+
+        engine.transpositions.clear()
+        start = time.perf_counter()
+        action = engine.minimax(engine.initial_state())
+        elapsed = time.perf_counter() - start
+        print(f"{name:>8}: first move {action} in {1000 * elapsed:.2f} ms")
+
+    book.loaded = book.load(book.BOOK)
+    if book.loaded is None:
+        print("    book: missing, build it with python book.py")
+        return
+    board = ttt.initial_state()
+    start = time.perf_counter()
+    action = ttt.minimax(board)
+    elapsed = time.perf_counter() - start
+    print(f"{'book':>8}: first move {action} in {1000 * elapsed:.3f} ms")
+
+
+def main():
+    usage = ("Usage: python benchmark.py search\n"
+             "       python benchmark.py engines")
+    if len(sys.argv) != 2:
+        sys.exit(usage)
+    if sys.argv[1] == "search":
+        search_benchmark()
+    elif sys.argv[1] == "engines":
+        engine_benchmark()
+    else:
+        sys.exit(usage)
+
+
+if __name__ == "__main__":
+    main()
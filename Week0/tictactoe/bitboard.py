@@ -0,0 +1,198 @@
+"""
+Tic Tac Toe Player on bitboards
+
+A board is a pair (x, o) of 9-bit masks of the cells each player holds,
+cell (i, j) being bit 3 * i + j. Making a move is a single OR and undoing
+it is keeping the previous pair, so search never copies a board.
+"""
+
+import math
+
+X = "X"
+O = "O"
+EMPTY = None
+
+FULL = 0b111111111
+
+# The three rows, three columns and two diagonals
+LINES = [
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100
+]
+
+# Whether a mask of cells contains a whole line, for every mask
+WON = bytes(any(mask & line == line for line in LINES) for mask in range(FULL + 1))
+
+# The number of cells in a mask, for every mask
+COUNT = bytes(bin(mask).count("1") for mask in range(FULL + 1))
+
+# Transposition table flags, as in tictactoe
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Values of positions already searched for the player to move,
+# by their cells << 9 | the opponent's cells
+transpositions = {}
+
+
+def bit(action):
+    return 1 << (3 * action[0] + action[1])
+
+
+def initial_state():
+    """
+    Returns starting state of the board.
+    """
+    return (0, 0)
+
+
+def from_board(board):
+    """
+    Returns the bitboard of a tictactoe list board.
+    """
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == X:
+                x |= bit((i, j))
+            elif cell == O:
+                o |= bit((i, j))
+    return (x, o)
+
+
+def to_board(state):
+    """
+    Returns the tictactoe list board of a bitboard.
+    """
+    x, o = state
+    return [
+        [X if x & bit((i, j)) else O if o & bit((i, j)) else EMPTY for j in range(3)]
+        for i in range(3)
+    ]
+
+
+def player(state):
+    """
+    Returns player who has the next turn on a board.
+    """
+    x, o = state
+    return O if COUNT[x] > COUNT[o] else X
+
+
+def actions(state):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    taken = state[0] | state[1]
+    return {divmod(k, 3) for k in range(9) if not taken >> k & 1}
+
+
+def result(state, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    x, o = state
+    if not (0 <= action[0] < 3 and 0 <= action[1] < 3):
+        raise NameError('Action is not available!')
+    move = bit(action)
+    if (x | o) & move:
+        raise NameError('Action is not available!')
+    return (x, o | move) if COUNT[x] > COUNT[o] else (x | move, o)
+
+
+def winner(state):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    x, o = state
+    if WON[x]:
+        return X
+    elif WON[o]:
+        return O
+    return None
+
+
+def terminal(state):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    x, o = state
+    return bool(WON[x] or WON[o]) or x | o == FULL
+
+
+def utility(state):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    x, o = state
+    return 1 if WON[x] else -1 if WON[o] else 0
+
+
+def negamax(mine, theirs, alpha=-math.inf, beta=math.inf):
+    """
+    Returns the value of the position for the player to move, who holds
+    the cells mine, with alpha-beta pruning within (alpha, beta).
+    """
+    # The opponent just moved, so only they can have won
+    if WON[theirs]:
+        return -1
+    taken = mine | theirs
+    if taken == FULL:
+        return 0
+
+    key = mine << 9 | theirs
+    entry = transpositions.get(key)
+    if entry is not None:
+        v, flag = entry
+        if flag == EXACT:
+            return v
+        elif flag == LOWER:
+            alpha = max(alpha, v)
+        else:
+            beta = min(beta, v)
+        if alpha >= beta:
+            return v
+
+    window = (alpha, beta)
+    v = -math.inf
+    free = FULL & ~taken
+    while free:
+        move = free & -free
+        free ^= move
+        v = max(v, -negamax(theirs, mine | move, -beta, -alpha))
+        alpha = max(alpha, v)
+        if alpha >= beta:
+            break
+
+    if v <= window[0]:
+        transpositions[key] = (v, UPPER)
+    elif v >= window[1]:
+        transpositions[key] = (v, LOWER)
+    else:
+        transpositions[key] = (v, EXACT)
+    return v
+
+
+def minimax(state):
+    """
+    Returns the optimal action for the current player on the board.
+    """
+    if terminal(state):
+        return None
+
+    x, o = state
+    mine, theirs = (x, o) if player(state) == X else (o, x)
+    alpha = -math.inf
+    best_action = None
+    for action in sorted(actions(state)):
+        score = -negamax(theirs, mine | bit(action), -math.inf, -alpha)
+        if score > alpha:
+            alpha, best_action = score, action
+
+        # Nothing beats a win
+        if alpha == 1:
+            break
+
+    return best_action
@@ -0,0 +1,154 @@
+"""
+Opening book of the best move in every tic-tac-toe position
+
+Positions are reduced under the 8 symmetries of the board, so only one
+of every family of rotated or reflected positions is solved and stored.
+Build the book once with python book.py; tictactoe.minimax then answers
+by lookup and only searches if the book is missing.
+"""
+
+import os
+import struct
+import sys
+from array import array
+
+import bitboard
+
+VERSION = 1
+MAGIC = b"TTTBOOK\0"
+HEADER = struct.Struct("<8sII")
+
+BOOK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tictactoe.book")
+
+
+def transforms():
+    """
+    Returns the 8 symmetries of the board as the cell each cell moves to.
+    """
+    rotate = [3 * j + 2 - i for i in range(3) for j in range(3)]
+    reflect = [3 * i + 2 - j for i in range(3) for j in range(3)]
+    symmetries = [list(range(9))]
+    for _ in range(3):
+        symmetries.append([rotate[cell] for cell in symmetries[-1]])
+    symmetries += [[reflect[cell] for cell in symmetry] for symmetry in symmetries]
+    return symmetries
+
+
+SYMMETRIES = transforms()
+
+# Cell each cell comes from, undoing every symmetry
+INVERSES = [[symmetry.index(cell) for cell in range(9)] for symmetry in SYMMETRIES]
+
+# Every 9-bit mask moved by every symmetry
+MOVED = [
+    [sum(1 << symmetry[k] for k in range(9) if mask >> k & 1) for mask in range(512)]
+    for symmetry in SYMMETRIES
+]
+
+# Base 3 value of the cells of a mask, for numbering positions below 3 ** 9
+TERNARY = [sum(3 ** k for k in range(9) if mask >> k & 1) for mask in range(512)]
+
+
+def canonical(state):
+    """
+    Returns the number of the smallest symmetric copy of a bitboard and
+    the symmetry that gives it.
+    """
+    x, o = state
+    return min(
+        (TERNARY[moved[x]] + 2 * TERNARY[moved[o]], s) for s, moved in enumerate(MOVED)
+    )
+
+
+def build():
+    """
+    Solves every reachable position that is not over, one per symmetry
+    family, and returns the position numbers and best cells as arrays.
+    """
+    book = {}
+    seen = set()
+    frontier = [bitboard.initial_state()]
+    while frontier:
+        state = frontier.pop()
+        number, s = canonical(state)
+        if number in seen or bitboard.terminal(state):
+            continue
+        seen.add(number)
+
+        # Solve the position in its canonical orientation
+        x, o = MOVED[s][state[0]], MOVED[s][state[1]]
+        i, j = bitboard.minimax((x, o))
+        book[number] = 3 * i + j
+
+        frontier.extend(bitboard.result(state, action) for action in bitboard.actions(state))
+
+    numbers = sorted(book)
+    return array("H", numbers), bytes(book[number] for number in numbers)
+
+
+def save(path, numbers, cells):
+    """
+    Writes the book to path, little-endian on every machine.
+    """
+    if sys.byteorder == "big":
+        numbers = array("H", numbers)
+        numbers.byteswap()
+    with open(path + ".tmp", "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(numbers)))
+        f.write(numbers.tobytes())
+        f.write(cells)
+    os.replace(path + ".tmp", path)
+
+
+def load(path):
+    """
+    Returns the book at path as a dict from position number to cell,
+    or None if it is missing or was written by another version.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, count = HEADER.unpack_from(data)
+    except (OSError, struct.error):
+        return None
+    if magic != MAGIC or version != VERSION or len(data) != HEADER.size + 3 * count:
+        return None
+
+    numbers = array("H")
+    numbers.frombytes(data[HEADER.size:HEADER.size + 2 * count])
+    if sys.byteorder == "big":
+        numbers.byteswap()
+    return dict(zip(numbers, data[HEADER.size + 2 * count:]))
+
+
+# The book, loaded the first time it is needed
+loaded = None
+
+
+def lookup(board):
+    """
+    Returns the best action (i, j) on a tictactoe list board, or None if
+    the book is missing or does not have the position.
+    """
+    global loaded
+    if loaded is None:
+        loaded = load(BOOK) or {}
+    if not loaded:
+        return None
+
+    number, s = canonical(bitboard.from_board(board))
+    cell = loaded.get(number)
+    if cell is None:
+        return None
+    return divmod(INVERSES[s][cell], 3)
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) == 2 else BOOK
+    numbers, cells = build()
+    save(path, numbers, cells)
+    print(f"Wrote {len(numbers)} positions to {path}")
+
+
+if __name__ == "__main__":
+    main()
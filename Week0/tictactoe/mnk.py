@@ -0,0 +1,341 @@
+"""
+m,n,k-game Player
+
+Players take turns on an m by n board and the first to get k in a row,
+column or diagonal wins; tic-tac-toe is the 3,3,3-game. Boards are the
+same lists of rows as in tictactoe, and the module level functions play
+tic-tac-toe, so mnk can stand in for tictactoe.
+
+Bigger boards are far too big to search to the end, so minimax searches
+one move deeper at a time until its time budget runs out, and scores the
+positions where it stops by the lines each player could still complete.
+"""
+
+import math
+import random
+import sys
+import time
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Score of a win; wins sooner score higher, and anything above MATE is a
+# forced result rather than an estimate
+WIN = 10 ** 9
+MATE = WIN - 1000
+
+# Transposition table flags, as in tictactoe
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Positions searched between checks of the clock and the stop event
+CHECK_EVERY = 1024
+
+
+class Timeout(Exception):
+    pass
+
+
+class Game():
+
+    def __init__(self, m=3, n=3, k=3):
+        if not 0 < k <= max(m, n):
+            raise Exception(f"cannot get {k} in a row on a {m}x{n} board")
+        self.m = m
+        self.n = n
+        self.k = k
+
+        # Every run of k cells in a row, column or diagonal, and the runs
+        # through each cell, with cells numbered i * n + j
+        self.lines = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+                    if 0 <= i + (k - 1) * di < m and 0 <= j + (k - 1) * dj < n:
+                        self.lines.append([(i + s * di) * n + j + s * dj for s in range(k)])
+        self.lines_through = [[] for _ in range(m * n)]
+        for number, line in enumerate(self.lines):
+            for cell in line:
+                self.lines_through[cell].append(number)
+
+        # Worth of a line holding c of one player's marks and none of the other's
+        self.worth = [0] + [4 ** c for c in range(1, k)] + [WIN]
+
+        # Cells from the center out, the usual order to try moves in
+        self.order = sorted(
+            range(m * n), key=lambda c: abs(c // n - (m - 1) / 2) + abs(c % n - (n - 1) / 2)
+        )
+
+        # Zobrist keys: a random number for each player in each cell
+        rng = random.Random(0)
+        self.keys = [[rng.getrandbits(64) for _ in range(2)] for _ in range(m * n)]
+
+        self.transpositions = {}
+        self.history = [0] * (m * n)
+        self.nodes = 0
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.n for _ in range(self.m)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        x = sum(row.count(X) for row in board)
+        o = sum(row.count(O) for row in board)
+        return O if x > o else X
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {(i, j) for i, row in enumerate(board) for j, cell in enumerate(row) if cell == EMPTY}
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if not (0 <= i < self.m and 0 <= j < self.n) or board[i][j] != EMPTY:
+            raise NameError('Action is not available!')
+        copy_board = [row[:] for row in board]
+        copy_board[i][j] = self.player(board)
+        return copy_board
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        cells = [cell for row in board for cell in row]
+        for line in self.lines:
+            first = cells[line[0]]
+            if first != EMPTY and all(cells[cell] == first for cell in line):
+                return first
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return self.winner(board) is not None or all(EMPTY not in row for row in board)
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        w = self.winner(board)
+        return 1 if w == X else -1 if w == O else 0
+
+    def minimax(self, board, budget=None, stop=None):
+        """
+        Returns the best action for the current player on the board.
+
+        Searches one move deeper at a time until the result is certain or,
+        if budget is given, until budget seconds have passed, and returns
+        the best action of the deepest finished search. Without a budget
+        the search always goes to the end, so the action is optimal.
+        Setting the threading.Event stop ends the search early the same way.
+
+        A Game searches one board at a time.
+        """
+        if self.terminal(board):
+            return None
+
+        # Set up the search state from the list board
+        self.cells = [cell for row in board for cell in row]
+        self.counts = [[0, 0] for _ in self.lines]
+        self.hash = 0
+        for cell, mark in enumerate(self.cells):
+            if mark != EMPTY:
+                self.place(cell, 0 if mark == X else 1)
+        me = 0 if self.player(board) == X else 1
+        empty = self.cells.count(EMPTY)
+
+        self.deadline = None if budget is None else time.perf_counter() + budget
+        self.stop = stop
+        self.nodes = 0
+        self.history = [0] * (self.m * self.n)
+
+        best = next(cell for cell in self.order if self.cells[cell] == EMPTY)
+        for depth in range(1, empty + 1):
+            try:
+                score, move = self.root(me, depth, empty)
+            except Timeout:
+                break
+            best = move
+            if abs(score) > MATE:
+                break
+
+        self.cells = None
+        return divmod(best, self.n)
+
+    def stopped(self):
+        """
+        Checks if the search is out of time or was asked to stop.
+        """
+        return ((self.deadline is not None and time.perf_counter() > self.deadline)
+                or (self.stop is not None and self.stop.is_set()))
+
+    def place(self, cell, me):
+        self.cells[cell] = me
+        self.hash ^= self.keys[cell][me]
+        for line in self.lines_through[cell]:
+            self.counts[line][me] += 1
+
+    def remove(self, cell, me):
+        self.cells[cell] = EMPTY
+        self.hash ^= self.keys[cell][me]
+        for line in self.lines_through[cell]:
+            self.counts[line][me] -= 1
+
+    def won(self, cell, me):
+        """
+        Checks if the mark me just placed in cell completed a line.
+        """
+        return any(self.counts[line][me] == self.k for line in self.lines_through[cell])
+
+    def evaluate(self, me):
+        """
+        Returns an estimate of the position for player me, from the lines
+        each player could still complete and how full they are.
+        """
+        worth = self.worth
+        score = 0
+        for mine, theirs in self.counts:
+            if not theirs:
+                score += worth[mine]
+            elif not mine:
+                score -= worth[theirs]
+        return score if me == 0 else -score
+
+    def moves(self, best):
+        """
+        Returns the empty cells in the order to search them: the best move
+        found before first, then the moves that caused the most cutoffs.
+        """
+        moves = [cell for cell in self.order if self.cells[cell] == EMPTY]
+        moves.sort(key=lambda cell: -self.history[cell])
+        if best is not None and best in moves:
+            moves.remove(best)
+            moves.insert(0, best)
+        return moves
+
+    def root(self, me, depth, empty):
+        """
+        Returns the score and best move of a search depth moves deep.
+        """
+        entry = self.transpositions.get(self.hash)
+        alpha = -math.inf
+        best = None
+        for move in self.moves(entry[3] if entry else None):
+            score = self.child(move, me, depth, empty, 0, alpha, math.inf)
+            if score > alpha:
+                alpha, best = score, move
+        self.transpositions[self.hash] = (depth, alpha, EXACT, best)
+        return alpha, best
+
+    def child(self, move, me, depth, empty, ply, alpha, beta):
+        """
+        Returns the score for me of playing move, searching depth - 1 moves after it.
+        """
+        self.place(move, me)
+        try:
+            if self.won(move, me):
+                return WIN - ply - 1
+            elif empty == 1:
+                return 0
+            return -self.negamax(1 - me, depth - 1, empty - 1, ply + 1, -beta, -alpha)
+        finally:
+            self.remove(move, me)
+
+    def negamax(self, me, depth, empty, ply, alpha, beta):
+        """
+        Returns the score of the position for me, the player to move,
+        searching depth moves deep with alpha-beta pruning.
+        """
+        self.nodes += 1
+        if self.nodes % CHECK_EVERY == 0 and self.stopped():
+            raise Timeout
+        if depth == 0:
+            return self.evaluate(me)
+
+        # Shallower searches only suggest a move to try first. Forced
+        # results are stored relative to their position, not the root
+        entry = self.transpositions.get(self.hash)
+        best = None
+        if entry is not None:
+            entry_depth, score, flag, best = entry
+            if score > MATE:
+                score -= ply
+            elif score < -MATE:
+                score += ply
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return score
+                elif flag == LOWER:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+
+        window = (alpha, beta)
+        v = -math.inf
+        for move in self.moves(best):
+            score = self.child(move, me, depth, empty, ply, alpha, beta)
+            if score > v:
+                v, best = score, move
+            alpha = max(alpha, v)
+            if alpha >= beta:
+                self.history[move] += depth * depth
+                break
+
+        stored = v + ply if v > MATE else v - ply if v < -MATE else v
+        if v <= window[0]:
+            flag = UPPER
+        elif v >= window[1]:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.transpositions[self.hash] = (depth, stored, flag, best)
+        return v
+
+
+# Tic-tac-toe through the same functions as tictactoe
+game = Game()
+initial_state = game.initial_state
+player = game.player
+actions = game.actions
+result = game.result
+winner = game.winner
+terminal = game.terminal
+utility = game.utility
+minimax = game.minimax
+
+
+def main():
+    if len(sys.argv) not in [4, 5]:
+        sys.exit("Usage: python mnk.py m n k [seconds per move]")
+    m, n, k = (int(arg) for arg in sys.argv[1:4])
+    budget = float(sys.argv[4]) if len(sys.argv) == 5 else 1.0
+
+    g = Game(m, n, k)
+    board = g.initial_state()
+    while not g.terminal(board):
+        start = time.perf_counter()
+        action = g.minimax(board, budget)
+        elapsed = time.perf_counter() - start
+        print(f"{g.player(board)} plays {action} after {g.nodes} nodes in {elapsed:.2f} s")
+        board = g.result(board, action)
+        for row in board:
+            print(" ".join(cell or "." for cell in row))
+    print("Winner:", g.winner(board))
+
+
+if __name__ == "__main__":
+    main()
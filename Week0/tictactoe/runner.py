@@ -1,12 +1,18 @@
 import pygame
 import sys
-import time
+import threading
+import traceback
 
+import mnk
 import tictactoe as ttt
 
 pygame.init()
 size = width, height = 600, 400
 
+# Seconds the computer may think about a move, and frames drawn per second
+time_limit = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+fps = 60
+
 # Colors
 black = (0, 0, 0)
 white = (255, 255, 255)
@@ -17,15 +23,55 @@ mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+clock = pygame.time.Clock()
+
 user = None
 board = ttt.initial_state()
-ai_turn = False
+
+# The computer searches in a thread of its own so the window keeps
+# drawing and answering while it thinks
+engine = mnk.Game()
+ai_thread = None
+ai_stop = None
+ai_move = {}
+
+
+def think(board, stop):
+    """
+    Stores the computer's move in ai_move["action"]. If the search fails,
+    stores the first legal move instead, so the game never waits on a
+    move that will not come.
+    """
+    try:
+        action = engine.minimax(board, time_limit, stop)
+    except Exception:
+        traceback.print_exc()
+        action = None
+    if action not in ttt.actions(board):
+        action = min(ttt.actions(board))
+    ai_move["action"] = action
+
+
+def cancel_ai():
+    """
+    Stops the computer's search, if any, and waits for its thread to end.
+    """
+    global ai_thread
+    if ai_thread is not None:
+        ai_stop.set()
+        ai_thread.join()
+        ai_thread = None
+
 
 while True:
 
+    mouse = None
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            cancel_ai()
             sys.exit()
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            mouse = event.pos
 
     screen.fill(black)
 
@@ -54,14 +100,10 @@ while True:
         screen.blit(playO, playORect)
 
         # Check if button is clicked
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1:
-            mouse = pygame.mouse.get_pos()
+        if mouse is not None:
             if playXButton.collidepoint(mouse):
-                time.sleep(0.2)
                 user = ttt.X
             elif playOButton.collidepoint(mouse):
-                time.sleep(0.2)
                 user = ttt.O
 
     else:
@@ -110,18 +152,18 @@ while True:
 
         # Check for AI move
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if ai_thread is None:
+                ai_stop = threading.Event()
+                ai_thread = threading.Thread(
+                    target=think, args=([row[:] for row in board], ai_stop), daemon=True
+                )
+                ai_thread.start()
+            elif not ai_thread.is_alive():
+                ai_thread = None
+                board = ttt.result(board, ai_move.pop("action"))
 
         # Check for a user move
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1 and user == player and not game_over:
-            mouse = pygame.mouse.get_pos()
+        if mouse is not None and user == player and not game_over:
             for i in range(3):
                 for j in range(3):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
@@ -134,13 +176,10 @@ while True:
             againRect.center = againButton.center
             pygame.draw.rect(screen, white, againButton)
             screen.blit(again, againRect)
-            click, _, _ = pygame.mouse.get_pressed()
-            if click == 1:
-                mouse = pygame.mouse.get_pos()
-                if againButton.collidepoint(mouse):
-                    time.sleep(0.2)
-                    user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+            if mouse is not None and againButton.collidepoint(mouse):
+                cancel_ai()
+                user = None
+                board = ttt.initial_state()
 
     pygame.display.flip()
+    clock.tick(fps)
@@ -0,0 +1,108 @@
+import multiprocessing
+import random
+import sys
+import time
+from collections import Counter
+
+import bitboard
+import book
+import mnk
+import tictactoe as ttt
+
+
+def random_agent(board, rng):
+    return rng.choice(sorted(ttt.actions(board)))
+
+
+def minimax_agent(board, rng):
+    return ttt.search(board)
+
+
+def book_agent(board, rng):
+    action = book.lookup(board)
+    return action if action is not None else ttt.search(board)
+
+
+def bitboard_agent(board, rng):
+    return bitboard.minimax(bitboard.from_board(board))
+
+
+def mnk_agent(board, rng):
+    return mnk.minimax(board)
+
+
+# Ways to pick a move on a board, given a random number generator
+AGENTS = {
+    "minimax": minimax_agent,
+    "random": random_agent,
+    "book": book_agent,
+    "bitboard": bitboard_agent,
+    "mnk": mnk_agent
+}
+
+
+def play(game):
+    """
+    Plays one game between the agents named x and o, and returns the
+    winner (None for a tie) and each agent's move latencies in seconds.
+    """
+    x, o, seed = game
+    rng = random.Random(seed)
+    latencies = {x: [], o: []}
+    board = ttt.initial_state()
+    while not ttt.terminal(board):
+        name = x if ttt.player(board) == ttt.X else o
+        start = time.perf_counter()
+        action = AGENTS[name](board, rng)
+        latencies[name].append(time.perf_counter() - start)
+        board = ttt.result(board, action)
+    return ttt.winner(board), latencies
+
+
+def percentile(values, p):
+    """
+    Returns the nearest-rank p-th percentile of sorted values.
+    """
+    return values[max(0, min(len(values) - 1, round(p / 100 * len(values)) - 1))]
+
+
+def selfplay(games, x, o, workers=None, seed=0):
+    """
+    Plays games between the agents x and o in a pool of worker processes.
+
+    Returns the number of each outcome, every move latency by agent and
+    the wall time taken.
+    """
+    outcomes = Counter()
+    latencies = {x: [], o: []}
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers) as pool:
+        jobs = ((x, o, seed + i) for i in range(games))
+        for winner, moves in pool.imap_unordered(play, jobs, chunksize=max(1, games // 64)):
+            outcomes[winner or "tie"] += 1
+            for name, times in moves.items():
+                latencies[name].extend(times)
+    return outcomes, latencies, time.perf_counter() - start
+
+
+def main():
+    usage = (f"Usage: python selfplay.py games x_agent o_agent [workers]\n"
+             f"Agents: {', '.join(AGENTS)}")
+    if len(sys.argv) not in [4, 5] or sys.argv[2] not in AGENTS or sys.argv[3] not in AGENTS:
+        sys.exit(usage)
+    games = int(sys.argv[1])
+    x, o = sys.argv[2], sys.argv[3]
+    workers = int(sys.argv[4]) if len(sys.argv) == 5 else None
+
+    outcomes, latencies, elapsed = selfplay(games, x, o, workers)
+    print(f"{games} games in {elapsed:.2f} s, {games / elapsed:.1f} games/s")
+    print(f"X ({x}) wins: {outcomes['X']}, O ({o}) wins: {outcomes['O']}, ties: {outcomes['tie']}")
+    for name, times in latencies.items():
+        times.sort()
+        print(f"{name:>8} move latency over {len(times)} moves: " + ", ".join(
+            f"p{p} {1000 * percentile(times, p):.3f} ms" for p in [50, 90, 99]
+        ) + f", max {1000 * times[-1]:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ Tic Tac Toe Player
 import math
 import copy
 
+import book
+
 X = "X"
 O = "O"
 EMPTY = None
@@ -120,53 +122,101 @@ def utility(board):
         return 0
 
 
+# Transposition table flags: the stored value is exact, or only a
+# lower or upper bound because the search was cut off by alpha-beta
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Values of positions already searched, by encode(board)
+transpositions = {}
+
+
+def encode(board):
+    """
+    Returns a string of the nine cells, the same for every equal board.
+    """
+    return "".join(cell or "-" for row in board for cell in row)
+
+
+def value(board, alpha=-math.inf, beta=math.inf):
+    """
+    Returns the minimax value of the board, searching only as far as
+    needed to tell whether it lies below alpha, above beta or between.
+    """
+    if terminal(board):
+        return utility(board)
+
+    key = encode(board)
+    if key in transpositions:
+        v, flag = transpositions[key]
+        if flag == EXACT:
+            return v
+        elif flag == LOWER:
+            alpha = max(alpha, v)
+        else:
+            beta = min(beta, v)
+        if alpha >= beta:
+            return v
+
+    # Classify the result against the window it was searched with
+    window = (alpha, beta)
+    maximizing = player(board) == X
+    v = -math.inf if maximizing else math.inf
+    for action in actions(board):
+        score = value(result(board, action), alpha, beta)
+        if maximizing:
+            v = max(v, score)
+            alpha = max(alpha, v)
+        else:
+            v = min(v, score)
+            beta = min(beta, v)
+        if alpha >= beta:
+            break
+
+    if v <= window[0]:
+        transpositions[key] = (v, UPPER)
+    elif v >= window[1]:
+        transpositions[key] = (v, LOWER)
+    else:
+        transpositions[key] = (v, EXACT)
+    return v
+
+
 def minimax(board):
     """
     Returns the optimal action for the current player on the board.
     """
-    # Check the max value for a specific board
-    def maxValue(newBoard):
-        v = -math.inf
-        
-        # If the game is over return the result
-        if terminal(newBoard):
-            return utility(newBoard)
-        
-        for action in actions(newBoard):
-            v = max(v,minValue(result(newBoard, action)))
-        return v
-        
-    # Check the min value for a specific board
-    def minValue(newBoard):
-        v = math.inf
-
-        # If the game is over return the result
-        if terminal(newBoard):
-            return utility(newBoard)
-        
-        for action in actions(newBoard):
-            v = min(v,maxValue(result(newBoard, action)))
-        return v
-        
-    if player(board) == X:
-        best_score = -math.inf
-        for action in actions(board):
-            score = minValue(result(board,action))
-            if score > best_score:
-                best_score = score
-                best_action = action
-                if best_score == 1:
-                    return action
-    else: 
-        best_score = math.inf
-        for action in actions(board):
-            score = maxValue(result(board,action))
-            if score < best_score:
-                best_score = score
-                best_action = action
-                if best_score == -1:
-                    return action
+    if terminal(board):
+        return None
+
+    # Positions in the opening book need no search
+    action = book.lookup(board)
+    if action is not None:
+        return action
+    return search(board)
 
-    return best_action
 
-            
+def search(board):
+    """
+    Returns the optimal action for the current player on the board,
+    searching for it without the opening book.
+    """
+    if terminal(board):
+        return None
+
+    maximizing = player(board) == X
+    alpha, beta = -math.inf, math.inf
+    best_action = None
+    for action in sorted(actions(board)):
+        score = value(result(board, action), alpha, beta)
+        if maximizing and score > alpha:
+            alpha, best_action = score, action
+        elif not maximizing and score < beta:
+            beta, best_action = score, action
+
+        # Nothing beats a win
+        if (alpha if maximizing else -beta) == 1:
+            break
+
+    return best_action
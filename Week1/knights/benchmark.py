@@ -0,0 +1,39 @@
+import sys
+import time
+
+import puzzle
+from logic import ENTAILED, model_check, model_check_many
+
+METHODS = ["enumerate", "sat", "table"]
+
+
+def check(methods):
+    """
+    Answers every puzzle's queries with each method, one query at a time
+    and all at once, printing the time taken and failing if two disagree.
+    """
+    symbols = [puzzle.AKnight, puzzle.AKnave, puzzle.BKnight, puzzle.BKnave, puzzle.CKnight, puzzle.CKnave]
+    knowledge = [puzzle.knowledge0, puzzle.knowledge1, puzzle.knowledge2, puzzle.knowledge3]
+    for number, kb in enumerate(knowledge):
+        answers = None
+        for method in methods:
+            start = time.perf_counter()
+            result = [model_check(kb, symbol, method) for symbol in symbols]
+            elapsed = time.perf_counter() - start
+            print(f"Puzzle {number} {method:>15}: {len(symbols)} queries {1000 * elapsed:8.2f} ms")
+            if answers is not None and result != answers:
+                raise Exception(f"{method} disagrees on puzzle {number}")
+            answers = result
+
+            start = time.perf_counter()
+            result = [answer == ENTAILED for answer in model_check_many(kb, symbols, method)]
+            elapsed = time.perf_counter() - start
+            print(f"Puzzle {number} {method + ' many':>15}: {len(symbols)} queries {1000 * elapsed:8.2f} ms")
+            if result != answers:
+                raise Exception(f"{method} many disagrees on puzzle {number}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and any(method not in METHODS for method in sys.argv[1:]):
+        sys.exit(f"Usage: python benchmark.py [{'|'.join(METHODS)}]...")
+    check(sys.argv[1:] or METHODS)
@@ -94,8 +94,8 @@ def main():
         if len(knowledge.conjuncts) == 0:
             print("    Not yet implemented.")
         else:
-            for symbol in symbols:
-                if model_check(knowledge, symbol):
+            for symbol, answer in zip(symbols, model_check_many(knowledge, symbols)):
+                if answer == ENTAILED:
                     print(f"    {symbol}")
 
 
@@ -0,0 +1,93 @@
+import random
+import sys
+import time
+
+import clue
+import harry
+import mastermind
+import puzzle
+from logic import ENTAILED, Not, model_check, model_check_many, table_check
+
+METHODS = ["enumerate", "sat", "table"]
+
+
+def puzzles():
+    """
+    Returns each puzzle's name, knowledge base and the queries its
+    script asks about it.
+    """
+    return [
+        ("harry", harry.knowledge, [harry.rain]),
+        ("clue", clue.knowledge, clue.symbols + [Not(symbol) for symbol in clue.symbols]),
+        ("mastermind", mastermind.knowledge, mastermind.symbols),
+        ("puzzle", puzzle.knowledge, puzzle.symbols)
+    ]
+
+
+def check(methods):
+    """
+    Answers every puzzle's queries with each method, one query at a time
+    and all at once, printing the time taken and failing if two disagree.
+    """
+    for name, knowledge, queries in puzzles():
+        answers = None
+        for method in methods:
+            start = time.perf_counter()
+            result = [model_check(knowledge, query, method) for query in queries]
+            elapsed = time.perf_counter() - start
+            print(f"{name:>10} {method:>15}: {len(queries):3} queries {1000 * elapsed:10.2f} ms")
+            if answers is not None and result != answers:
+                raise Exception(f"{method} disagrees on {name}")
+            answers = result
+
+            start = time.perf_counter()
+            result = [answer == ENTAILED for answer in model_check_many(knowledge, queries, method)]
+            elapsed = time.perf_counter() - start
+            print(f"{name:>10} {method + ' many':>15}: {len(queries):3} queries {1000 * elapsed:10.2f} ms")
+            if result != answers:
+                raise Exception(f"{method} many disagrees on {name}")
+
+        # The table answers every query from one pass over the models
+        if "table" in methods:
+            start = time.perf_counter()
+            result = table_check(knowledge, queries)
+            elapsed = time.perf_counter() - start
+            print(f"{name:>10} {'one pass':>15}: {len(queries):3} queries {1000 * elapsed:10.2f} ms")
+            if result != answers:
+                raise Exception(f"table disagrees on {name} in one pass")
+
+
+def throughput(count=4096):
+    """
+    Compares how many models per second each knowledge base evaluates
+    with Sentence.evaluate on dict models and compiled on int models.
+    """
+    rng = random.Random(0)
+    for name, knowledge, _ in puzzles():
+        symbols = sorted(knowledge.symbols())
+        models = [rng.getrandbits(len(symbols)) for _ in range(count)]
+        dicts = [{s: bool(m >> i & 1) for i, s in enumerate(symbols)} for m in models]
+
+        start = time.perf_counter()
+        expected = [knowledge.evaluate(model) for model in dicts]
+        evaluated = time.perf_counter() - start
+
+        function = knowledge.compile(symbols)
+        start = time.perf_counter()
+        result = [bool(function(model)) for model in models]
+        compiled = time.perf_counter() - start
+
+        if result != expected:
+            raise Exception(f"compiled {name} disagrees with evaluate")
+        print(f"{name:>10}: evaluate {count / evaluated:10.0f} models/s, "
+              f"compiled {count / compiled:10.0f} models/s ({evaluated / compiled:.0f}x)")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["throughput"]:
+        throughput()
+    elif len(sys.argv) > 1 and any(method not in METHODS for method in sys.argv[1:]):
+        sys.exit(f"Usage: python benchmark.py [{'|'.join(METHODS)}]...\n"
+                 f"       python benchmark.py throughput")
+    else:
+        check(sys.argv[1:] or METHODS)
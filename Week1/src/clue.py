@@ -21,10 +21,10 @@ symbols = characters + rooms + weapons
 
 
 def check_knowledge(knowledge):
-    for symbol in symbols:
-        if model_check(knowledge, symbol):
+    for symbol, answer in zip(symbols, model_check_many(knowledge, symbols)):
+        if answer == ENTAILED:
             termcolor.cprint(f"{symbol}: YES", "green")
-        elif not model_check(knowledge, Not(symbol)):
+        elif answer == UNKNOWN:
             print(f"{symbol}: MAYBE")
 
 
@@ -49,4 +49,5 @@ knowledge.add(Or(
 knowledge.add(Not(plum))
 knowledge.add(Not(ballroom))
 
-check_knowledge(knowledge)
+if __name__ == "__main__":
+    check_knowledge(knowledge)
@@ -11,4 +11,5 @@ knowledge = And(
     dumbledore
 )
 
-print(model_check(knowledge, rain))
+if __name__ == "__main__":
+    print(model_check(knowledge, rain))
@@ -1,8 +1,19 @@
+import heapq
 import itertools
+from array import array
+
+
+class EvaluationException(Exception):
+    pass
 
 
 class Sentence():
 
+    # Cached clauses and functions are kept with the hash of the sentence
+    # they were made from, so any change to the sentence makes them stale
+    cached_cnf = None
+    cached_function = None
+
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
@@ -15,6 +26,49 @@ class Sentence():
         """Returns a set of all symbols in the logical sentence."""
         return set()
 
+    def expression(self, indices):
+        """
+        Returns a Python expression evaluating the sentence for a model
+        given as the bits of an int m, at the index of each symbol name.
+        """
+        raise Exception("nothing to compile")
+
+    def compile(self, symbols):
+        """
+        Returns a function of an int whose bit i is the value of the
+        symbol named symbols[i], which is truthy when the sentence is true.
+
+        The function is cached on the sentence until the sentence changes.
+        Sentences nested too deeply for Python to compile are evaluated
+        on a model built from the bits instead.
+        """
+        symbols = tuple(symbols)
+        key = (hash(self), symbols)
+        cached = self.cached_function
+        if cached is None or cached[0] != key:
+            indices = {name: i for i, name in enumerate(symbols)}
+            try:
+                function = eval(f"lambda m: {self.expression(indices)}")
+            except (SyntaxError, RecursionError, MemoryError):
+                def function(m):
+                    return self.evaluate({name: m >> i & 1 for i, name in enumerate(symbols)})
+            self.cached_function = (key, function)
+        return self.cached_function[1]
+
+    def to_cnf(self):
+        """
+        Returns a ClauseStore of clauses that can be satisfied exactly
+        when the sentence can, Tseitin encoded.
+
+        The clauses are cached on the sentence until the sentence changes.
+        """
+        key = hash(self)
+        if self.cached_cnf is None or self.cached_cnf[0] != key:
+            store = ClauseStore()
+            Encoding(store, store.variables).assert_sentence(self)
+            self.cached_cnf = (key, store)
+        return self.cached_cnf[1]
+
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
@@ -68,6 +122,12 @@ class Symbol(Sentence):
     def symbols(self):
         return {self.name}
 
+    def expression(self, indices):
+        try:
+            return f"(m & {1 << indices[self.name]})"
+        except KeyError:
+            raise EvaluationException(f"variable {self.name} not in model")
+
 
 class Not(Sentence):
     def __init__(self, operand):
@@ -92,6 +152,9 @@ class Not(Sentence):
     def symbols(self):
         return self.operand.symbols()
 
+    def expression(self, indices):
+        return f"(not {self.operand.expression(indices)})"
+
 
 class And(Sentence):
     def __init__(self, *conjuncts):
@@ -129,6 +192,13 @@ class And(Sentence):
     def symbols(self):
         return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
 
+    def expression(self, indices):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join(
+            conjunct.expression(indices) for conjunct in self.conjuncts
+        ) + ")"
+
 
 class Or(Sentence):
     def __init__(self, *disjuncts):
@@ -160,6 +230,13 @@ class Or(Sentence):
     def symbols(self):
         return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
 
+    def expression(self, indices):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join(
+            disjunct.expression(indices) for disjunct in self.disjuncts
+        ) + ")"
+
 
 class Implication(Sentence):
     def __init__(self, antecedent, consequent):
@@ -191,6 +268,11 @@ class Implication(Sentence):
     def symbols(self):
         return set.union(self.antecedent.symbols(), self.consequent.symbols())
 
+    def expression(self, indices):
+        antecedent = self.antecedent.expression(indices)
+        consequent = self.consequent.expression(indices)
+        return f"(not {antecedent} or {consequent})"
+
 
 class Biconditional(Sentence):
     def __init__(self, left, right):
@@ -224,40 +306,568 @@ class Biconditional(Sentence):
     def symbols(self):
         return set.union(self.left.symbols(), self.right.symbols())
 
+    def expression(self, indices):
+        left = self.left.expression(indices)
+        right = self.right.expression(indices)
+        return f"((not {left}) == (not {right}))"
+
+
+# Answers of model_check_many
+ENTAILED = "entailed"
+REFUTED = "refuted"
+UNKNOWN = "unknown"
+
+
+def model_check(knowledge, query, method="sat"):
+    """
+    Checks if knowledge base entails query.
+
+    The "sat" method checks that knowledge and not query cannot both be
+    true with a SAT solver; "enumerate" checks every model, and "table"
+    checks every model at once with NumPy.
+    """
+    if method == "enumerate":
+        return enumerate_check(knowledge, query)
+    elif method == "table":
+        return table_check(knowledge, [query])[0]
+    elif method != "sat":
+        raise Exception(f"unknown method {method}")
+
+    store = knowledge.to_cnf()
+    solver = store.solver()
+    encoding = Encoding(solver, dict(store.variables))
+    return not solver.solve([-encoding.literal(query)])
+
+
+def model_check_many(knowledge, queries, method="sat"):
+    """
+    Returns ENTAILED, REFUTED or UNKNOWN for each query, as knowledge base
+    makes it true, makes it false or allows both.
+
+    Each method of model_check works through the knowledge base once for
+    every query. A knowledge base with no models entails every query.
+    """
+    if method == "enumerate":
+        outcomes = enumerate_outcomes(knowledge, queries)
+    elif method == "table":
+        outcomes = table_outcomes(knowledge, queries)
+    elif method == "sat":
+        outcomes = sat_outcomes(knowledge, queries)
+    else:
+        raise Exception(f"unknown method {method}")
+    return [
+        ENTAILED if not false else REFUTED if not true else UNKNOWN
+        for true, false in outcomes
+    ]
+
+
+def enumerate_outcomes(knowledge, queries):
+    """
+    Returns whether each query is true in some model of knowledge base and
+    false in some model, checking every model once.
+    """
+    symbols = sorted(set.union(knowledge.symbols(), *[query.symbols() for query in queries]))
+    knowledge = knowledge.compile(symbols)
+    functions = [query.compile(symbols) for query in queries]
+    outcomes = [[False, False] for _ in queries]
+
+    # Queries stop being checked once they have been both true and false
+    undecided = list(range(len(queries)))
+    for model in range(1 << len(symbols)):
+        if not undecided:
+            break
+        if knowledge(model):
+            for i in undecided:
+                outcomes[i][0 if functions[i](model) else 1] = True
+            undecided = [i for i in undecided if not all(outcomes[i])]
+    return outcomes
+
+
+def table_outcomes(knowledge, queries):
+    """
+    Returns whether each query is true in some model of knowledge base and
+    false in some model, from one truth table.
+    """
+    symbols = set.union(knowledge.symbols(), *[query.symbols() for query in queries])
+    table = TruthTable(sorted(symbols))
+    models = table.evaluate(knowledge)
+    outcomes = []
+    for query in queries:
+        values = table.evaluate(query)
+        outcomes.append([bool((models & values).any()), bool((models & ~values).any())])
+    return outcomes
+
+
+def sat_outcomes(knowledge, queries):
+    """
+    Returns whether each query is true in some model of knowledge base and
+    false in some model, with one SAT solver for every query.
+    """
+    store = knowledge.to_cnf()
+    solver = store.solver()
+    encoding = Encoding(solver, dict(store.variables))
+    literals = [encoding.literal(query) for query in queries]
+    outcomes = [[False, False] for _ in queries]
+
+    # Every model found also settles the other queries it makes true or false
+    for i, literal in enumerate(literals):
+        for side, assumption in [(0, literal), (1, -literal)]:
+            if not outcomes[i][side] and solver.solve([assumption]):
+                for j, other in enumerate(literals):
+                    outcomes[j][0 if solver.model[abs(other)] * other > 0 else 1] = True
+    return outcomes
+
+
+def enumerate_check(knowledge, query):
+    """Checks if knowledge base entails query by checking every model."""
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
+    # Get all symbols in both knowledge and query
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+
+    # Models are the ints below 2 ** len(symbols), a bit per symbol
+    knowledge = knowledge.compile(symbols)
+    query = query.compile(symbols)
+    for model in range(1 << len(symbols)):
+
+        # If knowledge base is true in model, then query must also be true
+        if knowledge(model) and not query(model):
+            return False
+    return True
+
+
+def table_check(knowledge, queries):
+    """
+    Returns whether knowledge base entails each query, evaluating the
+    knowledge base once over a truth table of every model.
+    """
+    symbols = set.union(knowledge.symbols(), *[query.symbols() for query in queries])
+    table = TruthTable(sorted(symbols))
+    models = table.evaluate(knowledge)
+    return [not (models & ~table.evaluate(query)).any() for query in queries]
+
+
+class TruthTable():
+    """
+    Every model of a few symbols, evaluated at once with NumPy.
+
+    Model m gives symbol i the value of bit i of m, and a sentence is
+    evaluated to its value in every model, packed 64 models to a uint64
+    word, by bitwise operations on the packed columns of the symbols.
+    """
+
+    # Most symbols a table may have: 2 ** 25 models take 4 MiB per column
+    MAX_SYMBOLS = 25
+
+    # Columns of the first 6 symbols within one word of 64 models
+    PATTERNS = [
+        0xAAAAAAAAAAAAAAAA, 0xCCCCCCCCCCCCCCCC, 0xF0F0F0F0F0F0F0F0,
+        0xFF00FF00FF00FF00, 0xFFFF0000FFFF0000, 0xFFFFFFFF00000000
+    ]
+
+    def __init__(self, symbols):
+        import numpy as np
+
+        if len(symbols) > TruthTable.MAX_SYMBOLS:
+            raise Exception(f"too many symbols for a truth table: {len(symbols)}")
+        words = max(1, 2 ** len(symbols) // 64)
+        self.columns = {}
+        for i, name in enumerate(symbols):
+            if i < 6:
+                column = np.full(words, TruthTable.PATTERNS[i], dtype=np.uint64)
+            else:
+                column = np.where(np.arange(words) >> (i - 6) & 1, ~np.uint64(0), np.uint64(0))
+            self.columns[name] = column
+
+        # Fewer than 64 models leave bits in the word that are not models
+        self.true = np.full(words, ~np.uint64(0), dtype=np.uint64)
+        if len(symbols) < 6:
+            self.true[0] = np.uint64((1 << 2 ** len(symbols)) - 1)
+        self.false = np.zeros(words, dtype=np.uint64)
+
+    def evaluate(self, sentence):
+        """Returns the packed values of sentence in every model."""
+        if isinstance(sentence, Symbol):
+            if sentence.name not in self.columns:
+                raise EvaluationException(f"variable {sentence.name} not in model")
+            return self.columns[sentence.name] & self.true
+        elif isinstance(sentence, Not):
+            return ~self.evaluate(sentence.operand) & self.true
+        elif isinstance(sentence, And):
+            result = self.true.copy()
+            for conjunct in sentence.conjuncts:
+                result &= self.evaluate(conjunct)
+            return result
+        elif isinstance(sentence, Or):
+            result = self.false.copy()
+            for disjunct in sentence.disjuncts:
+                result |= self.evaluate(disjunct)
+            return result
+        elif isinstance(sentence, Implication):
+            return ~self.evaluate(sentence.antecedent) & self.true | self.evaluate(sentence.consequent)
+        elif isinstance(sentence, Biconditional):
+            return ~(self.evaluate(sentence.left) ^ self.evaluate(sentence.right)) & self.true
+        raise Exception(f"cannot evaluate {sentence!r}")
+
+
+class Solver():
+    """
+    CDCL SAT solver over clauses of integer literals.
+
+    Variables are numbered from 1 and literal -v is the negation of v.
+    Unit propagation watches two literals per clause; every conflict
+    teaches the solver a new clause (the first unique implication point)
+    and jumps back to the level where that clause becomes unit.
+    Decisions go to the variables most involved in recent conflicts.
+    """
+
+    def __init__(self):
+        self.values = [0]
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.phases = [-1]
+        self.order = []
+        self.increment = 1.0
+
+        self.clauses = []
+        self.watches = {}
+        self.trail = []
+        self.limits = []
+        self.head = 0
+        self.ok = True
+        self.model = None
+
+    def new_variable(self):
+        self.values.append(0)
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.activity.append(0.0)
+        self.phases.append(-1)
+        variable = len(self.values) - 1
+        self.watches[variable] = []
+        self.watches[-variable] = []
+        heapq.heappush(self.order, (0.0, variable))
+        return variable
+
+    def value(self, literal):
+        """Returns 1 if literal is true, -1 if false, 0 if unassigned."""
+        v = self.values[abs(literal)]
+        return v if literal > 0 else -v
+
+    def add_clause(self, literals):
+        """
+        Adds a clause before solving, returning False if the clauses can
+        no longer all be satisfied.
+        """
+        if not self.ok:
+            return False
+        clause = []
+        for literal in dict.fromkeys(literals):
+            if -literal in clause or self.value(literal) == 1:
+                return True
+            if self.value(literal) == 0:
+                clause.append(literal)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.attach(clause)
+        return self.ok
+
+    def attach(self, clause):
+        self.clauses.append(clause)
+        self.watches[clause[0]].append(len(self.clauses) - 1)
+        self.watches[clause[1]].append(len(self.clauses) - 1)
+        return len(self.clauses) - 1
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.values[variable] = 1 if literal > 0 else -1
+        self.levels[variable] = len(self.limits)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal forced by the assignments so far, and returns
+        the number of a clause made false, or None if there is none.
+        """
+        clauses = self.clauses
+        values = self.values
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watching = self.watches[false]
+            kept = []
+            for i, number in enumerate(watching):
+                clause = clauses[number]
+                # Keep the false literal second
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], false
+                first = clause[0]
+                first_value = values[abs(first)] if first > 0 else -values[abs(first)]
+                if first_value == 1:
+                    kept.append(number)
+                    continue
+
+                # Look for another literal to watch
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    if (values[abs(literal)] if literal > 0 else -values[abs(literal)]) != -1:
+                        clause[1], clause[k] = literal, false
+                        self.watches[literal].append(number)
+                        break
+                else:
+                    kept.append(number)
+                    if first_value == -1:
+                        kept.extend(watching[i + 1:])
+                        self.watches[false] = kept
+                        return number
+                    self.assign(first, number)
+            self.watches[false] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns the clause learned from a conflict, with the literal it
+        will assert first, and the level to jump back to.
+        """
+        level = len(self.limits)
+        learned = [None]
+        seen = set()
+        pending = 0
+        literal = None
+        index = len(self.trail) - 1
+        clause = self.clauses[conflict]
+        while True:
+            for other in (clause if literal is None else clause[1:]):
+                variable = abs(other)
+                if variable not in seen and self.levels[variable] > 0:
+                    seen.add(variable)
+                    self.bump(variable)
+                    if self.levels[variable] == level:
+                        pending += 1
+                    else:
+                        learned.append(other)
+
+            # Walk back to the latest assignment involved in the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.clauses[self.reasons[abs(literal)]]
+
+        learned[0] = -literal
+        if len(learned) == 1:
+            return learned, 0
+
+        # Watch the literal assigned last after the asserting one
+        k = max(range(1, len(learned)), key=lambda k: self.levels[abs(learned[k])])
+        learned[1], learned[k] = learned[k], learned[1]
+        return learned, self.levels[abs(learned[1])]
+
+    def bump(self, variable):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+            self.order = [(-a, v) for v, a in enumerate(self.activity) if v and not self.values[v]]
+            heapq.heapify(self.order)
+        elif not self.values[variable]:
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+
+    def backtrack(self, level):
+        """Undoes every assignment made after level."""
+        if len(self.limits) <= level:
+            return
+        for literal in self.trail[self.limits[level]:]:
+            variable = abs(literal)
+            self.phases[variable] = 1 if literal > 0 else -1
+            self.values[variable] = 0
+            self.reasons[variable] = None
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+        del self.trail[self.limits[level]:]
+        del self.limits[level:]
+        self.head = len(self.trail)
+
+    def decide(self):
+        """Returns the unassigned variable to try next, or None if all are assigned."""
+        while self.order:
+            _, variable = heapq.heappop(self.order)
+            if not self.values[variable]:
+                return variable
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Checks if the clauses can all be satisfied with every literal of
+        assumptions true, leaving a satisfying assignment in model.
+        """
+        self.model = None
+        if not self.ok:
+            return False
+
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if not self.limits:
+                    self.ok = False
+                    return False
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.assign(learned[0], self.attach(learned))
+                self.increment /= 0.95
+                continue
+
+            # Assumptions are the first decisions, one level each
+            if len(self.limits) < len(assumptions):
+                literal = assumptions[len(self.limits)]
+                if self.value(literal) == -1:
+                    self.backtrack(0)
+                    return False
+                self.limits.append(len(self.trail))
+                if self.value(literal) == 0:
+                    self.assign(literal, None)
+                continue
+
+            variable = self.decide()
+            if variable is None:
+                self.model = self.values[:]
+                self.backtrack(0)
+                return True
+            self.limits.append(len(self.trail))
+            self.assign(variable * self.phases[variable], None)
+
+
+class ClauseStore():
+    """
+    Clauses of integer literals, numbered like a Solver's, stored flat.
+
+    The literals of every clause follow each other in one array and ends
+    holds where each clause stops. variables maps symbol names to their
+    variables; the other variables stand for compound sentences.
+    """
+
+    def __init__(self):
+        self.variables = {}
+        self.size = 0
+        self.literals = array("i")
+        self.ends = array("i")
+
+    def __len__(self):
+        return len(self.ends)
+
+    def __iter__(self):
+        start = 0
+        for end in self.ends:
+            yield self.literals[start:end]
+            start = end
+
+    def new_variable(self):
+        self.size += 1
+        return self.size
+
+    def add_clause(self, literals):
+        """Adds a clause, dropping repeated literals and clauses that always hold."""
+        clause = dict.fromkeys(literals)
+        if any(-literal in clause for literal in clause):
             return True
+        self.literals.extend(clause)
+        self.ends.append(len(self.literals))
+        return True
+
+    def solver(self):
+        """Returns a new Solver holding the clauses."""
+        solver = Solver()
+        for _ in range(self.size):
+            solver.new_variable()
+        for clause in self:
+            if not solver.add_clause(clause):
+                break
+        return solver
+
+
+class Encoding():
+    """
+    Tseitin encoding of sentences into clauses, added to a Solver or
+    ClauseStore.
+
+    Every compound sentence gets a variable of its own with clauses making
+    it equal to the sentence, so clauses grow linearly with the sentence
+    instead of exponentially.
+    """
+
+    def __init__(self, solver, variables=None):
+        self.solver = solver
+        self.variables = {} if variables is None else variables
+        self.definitions = {}
+
+    def variable(self, name):
+        if name not in self.variables:
+            self.variables[name] = self.solver.new_variable()
+        return self.variables[name]
+
+    def literal(self, sentence):
+        """Returns a literal equal to sentence, adding clauses to define it."""
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        elif isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+        elif sentence in self.definitions:
+            return self.definitions[sentence]
+
+        add = self.solver.add_clause
+        if isinstance(sentence, (And, Or)):
+            operands = sentence.conjuncts if isinstance(sentence, And) else sentence.disjuncts
+            literals = [self.literal(operand) for operand in operands]
+            if len(literals) == 1:
+                return literals[0]
+            # An Or is an And with every literal negated
+            sign = 1 if isinstance(sentence, And) else -1
+            x = self.solver.new_variable()
+            for literal in literals:
+                add([-sign * x, sign * literal])
+            add([sign * x] + [-sign * literal for literal in literals])
+        elif isinstance(sentence, Implication):
+            a = self.literal(sentence.antecedent)
+            b = self.literal(sentence.consequent)
+            x = self.solver.new_variable()
+            add([-x, -a, b])
+            add([x, a])
+            add([x, -b])
+        elif isinstance(sentence, Biconditional):
+            a = self.literal(sentence.left)
+            b = self.literal(sentence.right)
+            x = self.solver.new_variable()
+            add([-x, -a, b])
+            add([-x, a, -b])
+            add([x, a, b])
+            add([x, -a, -b])
         else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
-
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
-
-    # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
-
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+            raise Exception(f"cannot encode {sentence!r}")
+
+        self.definitions[sentence] = x
+        return x
+
+    def assert_sentence(self, sentence):
+        """Adds clauses making sentence true."""
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.assert_sentence(conjunct)
+        elif isinstance(sentence, Or):
+            self.solver.add_clause([self.literal(disjunct) for disjunct in sentence.disjuncts])
+        elif isinstance(sentence, Implication):
+            self.solver.add_clause([
+                -self.literal(sentence.antecedent), self.literal(sentence.consequent)
+            ])
+        else:
+            self.solver.add_clause([self.literal(sentence)])
@@ -51,6 +51,7 @@ knowledge.add(And(
     Not(Symbol("yellow3"))
 ))
 
-for symbol in symbols:
-    if model_check(knowledge, symbol):
-        print(symbol)
+if __name__ == "__main__":
+    for symbol, answer in zip(symbols, model_check_many(knowledge, symbols)):
+        if answer == ENTAILED:
+            print(symbol)
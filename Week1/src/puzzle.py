@@ -50,6 +50,7 @@ knowledge.add(
     Symbol("MinervaGryffindor")
 )
 
-for symbol in symbols:
-    if model_check(knowledge, symbol):
-        print(symbol)
+if __name__ == "__main__":
+    for symbol, answer in zip(symbols, model_check_many(knowledge, symbols)):
+        if answer == ENTAILED:
+            print(symbol)